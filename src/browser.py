@@ -0,0 +1,40 @@
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+# chromedriver is resolved (and downloaded if needed) once per process, not for every browser started
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def chromedriver_path():
+    """Returns the path of the chromedriver binary, resolving it with ChromeDriverManager on first use."""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
+
+
+def create_chrome_driver():
+    """
+    Starts a headless Chrome driver for the wiki scrapers.
+    """
+    options = Options()
+    options.add_argument("--headless")  # Run in headless mode (no GUI)
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    # Only the HTML is read, so skip downloading images, stylesheets and fonts
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+        "profile.managed_default_content_settings.fonts": 2,
+    })
+    # Return from get() at DOMContentLoaded; the wiki body is server-rendered and already in the DOM
+    options.page_load_strategy = "eager"
+
+    service = Service(chromedriver_path())
+    return webdriver.Chrome(service=service, options=options)
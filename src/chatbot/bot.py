@@ -3,9 +3,9 @@ import os
 import streamlit as st
 
 # Ensure correct imports
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from pipeline.pipeline import RAGPipeline
+from src.pipeline.pipeline import RAGPipeline
 
 # Initialize the RAG pipeline
 pipeline = RAGPipeline()
@@ -1,10 +1,13 @@
 import os
-import json
+import orjson
+import asyncio
 import google.generativeai as genai
 from tqdm import tqdm
+from src.embedding_cache import EmbeddingCache
 
 class EmbeddingGenerator:
-    def __init__(self, input_dir="data/chunks", output_dir="data/embeddings", model="models/embedding-001"):
+    def __init__(self, input_dir="data/chunks", output_dir="data/embeddings", model="models/embedding-001", batch_size=100, concurrency=None,
+                 cache_path="data/embeddings/embed_cache.sqlite"):
         """
         Initializes the embedding generator.
 
@@ -12,10 +15,16 @@ class EmbeddingGenerator:
             input_dir (str): Directory containing chunked JSON files.
             output_dir (str): Directory to store the embedding JSONL files.
             model (str): Google Gemini embedding model.
+            batch_size (int): Number of texts sent per batch embedding request (Gemini allows up to 100).
+            concurrency (int): Max batch requests in flight at once (defaults to GEMINI_CONCURRENCY or 8).
+            cache_path (str): SQLite file caching embeddings by content hash; None disables the cache.
         """
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.model = model
+        self.batch_size = batch_size
+        self.concurrency = concurrency or int(os.getenv("GEMINI_CONCURRENCY", "8"))
+        self.cache = EmbeddingCache(cache_path, model=model) if cache_path else None
 
         os.makedirs(self.output_dir, exist_ok=True)
 
@@ -25,8 +34,8 @@ class EmbeddingGenerator:
     def load_json(self, filepath):
         """Loads JSON data from a file."""
         try:
-            with open(filepath, "r", encoding="utf-8") as file:
-                return json.load(file)
+            with open(filepath, "rb") as file:
+                return orjson.loads(file.read())
         except Exception as e:
             print(f"❌ Error loading {filepath}: {e}")
             return None
@@ -35,10 +44,10 @@ class EmbeddingGenerator:
         """Saves data to a JSONL file."""
         output_path = os.path.join(self.output_dir, filename.replace(".json", ".jsonl"))
         try:
-            with open(output_path, "w", encoding="utf-8") as file:
+            with open(output_path, "wb") as file:
                 for entry in data:
-                    json.dump(entry, file, ensure_ascii=False)
-                    file.write("\n")
+                    file.write(orjson.dumps(entry))
+                    file.write(b"\n")
             print(f"✅ Embeddings saved to {output_path}")
         except Exception as e:
             print(f"❌ Error saving embeddings for {filename}: {e}")
@@ -52,27 +61,71 @@ class EmbeddingGenerator:
             print(f"❌ Embedding error: {e}")
             return None
 
-    def process_file(self, filename):
-        """Processes a single JSON file and generates embeddings."""
-        print(f"🔍 Processing {filename}")
-        filepath = os.path.join(self.input_dir, filename)
-        chunks = self.load_json(filepath)
-
-        if not chunks:
-            print(f"⚠️ Skipped {filename} due to loading error.")
-            return
+    async def _embed_batch(self, semaphore, progress, start, batch):
+        """Embeds one batch in a worker thread once a concurrency slot is free."""
+        async with semaphore:
+            try:
+                response = await asyncio.to_thread(
+                    genai.embed_content, model=self.model, content=batch, task_type="retrieval_document"
+                )
+                return response["embedding"]
+            except Exception as e:
+                print(f"❌ Embedding error for batch starting at {start}: {e}")
+                return [None] * len(batch)
+            finally:
+                progress.update(1)
+
+    async def generate_embeddings_async(self, texts, desc="Embedding", semaphore=None):
+        """
+        Generates embeddings for a list of texts, sending batch_size texts per request
+        (served by Gemini's batchEmbedContents) with up to `concurrency` requests in flight.
+        Texts already in the embedding cache are not sent to the API, and repeated texts are sent once.
+        Failed batches yield None for each of their texts. Output order matches `texts`.
+        Pass a shared `semaphore` to cap requests across several concurrent calls.
+        """
+        cached = self.cache.get_many(texts) if self.cache else {}
+        # dict.fromkeys keeps first-seen order while dropping duplicate texts
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.concurrency)
+        starts = range(0, len(missing), self.batch_size)
+        with tqdm(total=len(starts), desc=desc) as progress:
+            results = await asyncio.gather(*(
+                self._embed_batch(semaphore, progress, start, missing[start:start + self.batch_size])
+                for start in starts
+            ))
+        new_embeddings = {
+            text: embedding
+            for text, embedding in zip(missing, (e for batch_embeddings in results for e in batch_embeddings))
+            if embedding
+        }
+
+        if self.cache:
+            self.cache.put_many(new_embeddings.items())
+        return [cached.get(text) or new_embeddings.get(text) for text in texts]
+
+    def generate_embeddings(self, texts, desc="Embedding"):
+        """Synchronous wrapper around generate_embeddings_async."""
+        return asyncio.run(self.generate_embeddings_async(texts, desc=desc))
+
+    async def embed_chunks_async(self, filename, chunks, semaphore=None):
+        """Embeds the non-empty chunks of one file and returns the rows to save as JSONL."""
+        # Skip empty texts, collecting the remaining chunks and their texts in one pass
+        kept_chunks, texts = [], []
+        for chunk in chunks:
+            text = chunk.get("text", "")
+            if text.strip():
+                kept_chunks.append(chunk)
+                texts.append(text)
+        embeddings = await self.generate_embeddings_async(texts, desc=f"Embedding {filename}", semaphore=semaphore)
 
         embedded_data = []
-        for chunk in tqdm(chunks, desc=f"Embedding {filename}"):
-            text = chunk.get("text", "")
+        for chunk, text, embedding in zip(kept_chunks, texts, embeddings):
             chunk_id = chunk.get("chunk_id", "unknown")
             title = chunk.get("title", "Untitled")
             source = chunk.get("source", "Unknown")
 
-            if not text.strip():
-                continue  # Skip empty texts
-
-            embedding = self.generate_embedding(text)
             if embedding:
                 embedded_data.append({
                     "chunk_id": chunk_id,
@@ -81,15 +134,66 @@ class EmbeddingGenerator:
                     "source": source,
                     "embedding": embedding
                 })
+        return embedded_data
 
+    def process_file(self, filename):
+        """Processes a single JSON file and generates embeddings."""
+        print(f"🔍 Processing {filename}")
+        filepath = os.path.join(self.input_dir, filename)
+        chunks = self.load_json(filepath)
+
+        if not chunks:
+            print(f"⚠️ Skipped {filename} due to loading error.")
+            return
+
+        embedded_data = asyncio.run(self.embed_chunks_async(filename, chunks))
         if embedded_data:
             self.save_jsonl(filename, embedded_data)
 
+    async def run_async(self, workers=4, queue_size=4):
+        """
+        Embeds all chunked JSON files as a pipeline: a loader parses files onto a bounded queue,
+        `workers` embedders turn them into rows, and a writer saves the JSONL files.
+        Loading, API calls and writes for different files overlap, and all embedders
+        share one semaphore, so at most `concurrency` requests are in flight overall.
+        """
+        with os.scandir(self.input_dir) as entries:
+            files = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".json")]
+        load_queue = asyncio.Queue(maxsize=queue_size)
+        store_queue = asyncio.Queue(maxsize=queue_size)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def loader():
+            for filename in files:
+                print(f"🔍 Processing {filename}")
+                chunks = await asyncio.to_thread(self.load_json, os.path.join(self.input_dir, filename))
+                if not chunks:
+                    print(f"⚠️ Skipped {filename} due to loading error.")
+                    continue
+                await load_queue.put((filename, chunks))
+            # One stop marker per embedder
+            for _ in range(workers):
+                await load_queue.put(None)
+
+        async def embedder():
+            while (item := await load_queue.get()) is not None:
+                filename, chunks = item
+                embedded_data = await self.embed_chunks_async(filename, chunks, semaphore)
+                if embedded_data:
+                    await store_queue.put((filename, embedded_data))
+
+        async def writer():
+            while (item := await store_queue.get()) is not None:
+                await asyncio.to_thread(self.save_jsonl, *item)
+
+        writer_task = asyncio.create_task(writer())
+        await asyncio.gather(loader(), *(embedder() for _ in range(workers)))
+        await store_queue.put(None)
+        await writer_task
+
     def run(self):
         """Runs the embedding generation for all chunked JSON files."""
-        files = [f for f in os.listdir(self.input_dir) if f.endswith(".json")]
-        for file in files:
-            self.process_file(file)
+        asyncio.run(self.run_async())
 
 
 if __name__ == "__main__":
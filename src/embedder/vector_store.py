@@ -1,5 +1,6 @@
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import chromadb
 from tqdm import tqdm
 
@@ -21,49 +22,86 @@ class VectorStore:
         self.client = chromadb.PersistentClient(path=self.db_dir)
         self.collection = self.client.get_or_create_collection(name="minecraft_wiki")
 
+        # Ids already stored in the collection, fetched once on first use
+        self._existing_ids = None
+
     def load_jsonl(self, filepath):
         """Loads JSONL data from a file."""
         data = []
         try:
-            with open(filepath, "r", encoding="utf-8") as file:
+            with open(filepath, "rb") as file:
                 for line in file:
-                    data.append(json.loads(line.strip()))
+                    if line.strip():
+                        data.append(orjson.loads(line))
             return data
         except Exception as e:
             print(f"❌ Error loading {filepath}: {e}")
             return []
 
-    def add_to_vector_db(self, embeddings):
-        """Adds embeddings to the vector database."""
-        for entry in tqdm(embeddings, desc="Adding to ChromaDB"):
-            chunk_id = entry["chunk_id"]
-            vector = entry["embedding"]
-            document = entry["text"]
-            # print(f"📌 Chunk ID: {chunk_id}")
-            # print(f"🔹 Text: {document[:100]}...")  # Print first 100 chars of text
-            # print(f"🔹 Source: {entry.get('source', '❌ MISSING')}")
-            # print("-" * 40)
-
-            metadata = {
-                "title": entry["title"],
-                "source": entry["source"],
-                "text": entry["text"]
-            }
+    def existing_ids(self):
+        """
+        Returns the set of chunk IDs already stored in ChromaDB.
+        The collection is read once (IDs only) and the set is kept up to date as chunks are added.
+        """
+        if self._existing_ids is None:
+            try:
+                self._existing_ids = set(self.collection.get(include=[])["ids"])
+            except Exception as e:
+                print(f"⚠️ Error fetching existing chunk IDs: {e}")
+                return set()
+        return self._existing_ids
+
+    def add_to_vector_db(self, embeddings, batch_size=5000):
+        """Adds embeddings that are not yet stored to the vector database in slices of batch_size rows per add() call."""
+        existing = self.existing_ids()
+        # Duplicates within this input are tracked separately; existing only learns ids once add() succeeds
+        seen = set()
+        new_entries = []
+        for entry in embeddings:
+            if entry["chunk_id"] not in existing and entry["chunk_id"] not in seen:
+                new_entries.append(entry)
+                seen.add(entry["chunk_id"])
+
+        for start in tqdm(range(0, len(new_entries), batch_size), desc="Adding to ChromaDB"):
+            batch = new_entries[start:start + batch_size]
+            ids = [entry["chunk_id"] for entry in batch]
+            vectors = [entry["embedding"] for entry in batch]
+            documents = [entry["text"] for entry in batch]
+            metadatas = [
+                {
+                    "title": entry["title"],
+                    "source": entry["source"],
+                    "text": entry["text"]
+                }
+                for entry in batch
+            ]
 
             # Add to ChromaDB
-            self.collection.add(ids=[chunk_id], embeddings=[vector],documents=[document], metadatas=[metadata])
-
-    def process_files(self):
-        """Processes all JSONL files in the input directory."""
-        files = [f for f in os.listdir(self.input_dir) if f.endswith(".jsonl")]
-        for file in files:
-            filepath = os.path.join(self.input_dir, file)
-            print(f"🔍 Processing {file} for vector storage...")
-
-            embeddings = self.load_jsonl(filepath)
-            if embeddings:
-                self.add_to_vector_db(embeddings)
-                print(f"✅ Stored {len(embeddings)} embeddings from {file}")
+            self.collection.add(ids=ids, embeddings=vectors, documents=documents, metadatas=metadatas)
+            existing.update(ids)
+
+        return len(new_entries)
+
+    def process_files(self, max_workers=16):
+        """
+        Processes all JSONL files in the input directory.
+        Files are read and parsed max_workers at a time in a thread pool, then stored in order.
+        """
+        with os.scandir(self.input_dir) as entries:
+            files = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".jsonl")]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for start in range(0, len(files), max_workers):
+                window = files[start:start + max_workers]
+                loaded = executor.map(self.load_jsonl, [os.path.join(self.input_dir, file) for file in window])
+                for file, embeddings in zip(window, loaded):
+                    self._store_file(file, embeddings)
+
+    def _store_file(self, file, embeddings):
+        """Stores the embeddings loaded from one JSONL file."""
+        print(f"🔍 Processing {file} for vector storage...")
+        if embeddings:
+            added = self.add_to_vector_db(embeddings)
+            print(f"✅ Stored {added} new embeddings from {file} ({len(embeddings) - added} already present)")
 
     def run(self):
         """Runs the vector store process."""
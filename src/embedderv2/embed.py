@@ -1,6 +1,7 @@
 import os
-import json
+import orjson
 import logging
+import numpy as np
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 
@@ -9,7 +10,7 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 
 
 class EmbeddingGenerator:
-    def __init__(self, input_dir="data/chunks", output_dir="data/embeddings", model_name="BAAI/bge-base-en"):
+    def __init__(self, input_dir="data/chunks", output_dir="data/embeddings", model_name="BAAI/bge-base-en", batch_size=64):
         """
         Initializes the embedding generator.
 
@@ -17,10 +18,12 @@ class EmbeddingGenerator:
             input_dir (str): Directory containing chunked JSON files.
             output_dir (str): Directory to store the embedding JSONL files.
             model_name (str): Local embedding model (SentenceTransformer).
+            batch_size (int): Number of texts encoded per forward pass.
         """
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.model_name = model_name
+        self.batch_size = batch_size
 
         os.makedirs(self.output_dir, exist_ok=True)
 
@@ -31,8 +34,8 @@ class EmbeddingGenerator:
     def load_json(self, filepath):
         """Loads JSON data from a file."""
         try:
-            with open(filepath, "r", encoding="utf-8") as file:
-                return json.load(file)
+            with open(filepath, "rb") as file:
+                return orjson.loads(file.read())
         except Exception as e:
             logging.error(f"❌ Error loading {filepath}: {e}")
             return None
@@ -41,10 +44,10 @@ class EmbeddingGenerator:
         """Saves data to a JSONL file."""
         output_path = os.path.join(self.output_dir, filename.replace(".json", ".jsonl"))
         try:
-            with open(output_path, "w", encoding="utf-8") as file:
+            with open(output_path, "wb") as file:
                 for entry in data:
-                    json.dump(entry, file, ensure_ascii=False)
-                    file.write("\n")
+                    file.write(orjson.dumps(entry, option=orjson.OPT_SERIALIZE_NUMPY))
+                    file.write(b"\n")
             logging.info(f"✅ Embeddings saved to {output_path}")
         except Exception as e:
             logging.error(f"❌ Error saving embeddings for {filename}: {e}")
@@ -58,6 +61,24 @@ class EmbeddingGenerator:
             logging.error(f"❌ Embedding error: {e}")
             return None
 
+    def generate_embeddings(self, texts):
+        """
+        Generates embeddings for a list of texts in batches of batch_size, encoding repeated texts once.
+        Returns a float32 array with one row per text, or None if encoding fails.
+        """
+        # Map each text to its slot among the unique texts, in first-seen order
+        unique = {}
+        order = [unique.setdefault(text, len(unique)) for text in texts]
+        try:
+            unique_embeddings = self.model.encode(
+                list(unique), batch_size=self.batch_size, normalize_embeddings=True,
+                show_progress_bar=False, convert_to_numpy=True
+            ).astype(np.float32, copy=False)
+        except Exception as e:
+            logging.error(f"❌ Embedding error: {e}")
+            return None
+        return unique_embeddings[order]
+
     def process_file(self, filename):
         """Processes a single JSON file and generates embeddings."""
         output_filepath = os.path.join(self.output_dir, filename.replace(".json", ".jsonl"))
@@ -75,29 +96,42 @@ class EmbeddingGenerator:
             logging.warning(f"⚠️ Skipped {filename} due to loading error.")
             return
 
+        # Skip empty texts, keeping each remaining chunk alongside its stripped text in one pass
+        kept_chunks, texts = [], []
+        for chunk in chunks:
+            text = chunk.get("text", "").strip()
+            if text:
+                kept_chunks.append(chunk)
+                texts.append(text)
+        chunks = kept_chunks
+        if not texts:
+            logging.warning(f"⚠️ Skipped {filename}, no non-empty chunks.")
+            return
+
+        # Rows stay float32 NumPy vectors; orjson serializes them directly when saving
+        embeddings = self.generate_embeddings(texts)
+        if embeddings is None:
+            logging.warning(f"⚠️ Skipped {filename} due to embedding error.")
+            return
+
         embedded_data = []
         # One progress bar per file for processing chunks
-        for chunk in tqdm(chunks, desc=f"Embedding {filename}", leave=False):
-            text = chunk.get("text", "").strip()
-            if not text:
-                continue  # Skip empty texts
-
-            embedding = self.generate_embedding(text)
-            if embedding:
-                embedded_data.append({
-                    "chunk_id": chunk.get("chunk_id", "unknown"),
-                    "title": chunk.get("title", "Untitled"),
-                    "text": text,
-                    "source": chunk.get("source", "Unknown"),
-                    "embedding": embedding
-                })
+        for chunk, text, embedding in tqdm(zip(chunks, texts, embeddings), total=len(chunks), desc=f"Embedding {filename}", leave=False):
+            embedded_data.append({
+                "chunk_id": chunk.get("chunk_id", "unknown"),
+                "title": chunk.get("title", "Untitled"),
+                "text": text,
+                "source": chunk.get("source", "Unknown"),
+                "embedding": embedding
+            })
 
         if embedded_data:
             self.save_jsonl(filename, embedded_data)
 
     def run(self):
         """Runs the embedding generation for all chunked JSON files."""
-        files = [f for f in os.listdir(self.input_dir) if f.endswith(".json")]
+        with os.scandir(self.input_dir) as entries:
+            files = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".json")]
         # Use one overall progress bar for files
         for file in files:
             out_file = os.path.join(self.output_dir, file.replace(".json", ".jsonl"))
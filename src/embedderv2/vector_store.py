@@ -1,5 +1,6 @@
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import logging
 import chromadb
 from tqdm import tqdm
@@ -27,13 +28,17 @@ class VectorStore:
         self.client = chromadb.PersistentClient(path=self.db_dir)
         self.collection = self.client.get_or_create_collection(name=self.collection_name)
 
+        # Ids already stored in the collection, fetched once on first use
+        self._existing_ids = None
+
     def load_jsonl(self, filepath):
         """Loads JSONL data from a file."""
         data = []
         try:
-            with open(filepath, "r", encoding="utf-8") as file:
+            with open(filepath, "rb") as file:
                 for line in file:
-                    data.append(json.loads(line.strip()))
+                    if line.strip():
+                        data.append(orjson.loads(line))
             return data
         except Exception as e:
             logging.error(f"❌ Error loading {filepath}: {e}")
@@ -56,44 +61,82 @@ class VectorStore:
             logging.error(f"⚠️ Error checking chunk existence: {e}")
             return False
 
-    def add_to_vector_db(self, embeddings):
-        """Adds embeddings to the vector database, skipping duplicates."""
+    def existing_ids(self):
+        """
+        Returns the set of chunk IDs already stored in ChromaDB.
+        The collection is read once (IDs only) and the set is kept up to date as chunks are added.
+        """
+        if self._existing_ids is None:
+            try:
+                self._existing_ids = set(self.collection.get(include=[])["ids"])
+            except Exception as e:
+                logging.error(f"⚠️ Error fetching existing chunk IDs: {e}")
+                return set()
+        return self._existing_ids
+
+    def add_to_vector_db(self, embeddings, batch_size=5000):
+        """Adds embeddings to the vector database, skipping duplicates, in slices of batch_size rows per add() call."""
         skipped = 0
-        added = 0
+        new_entries = []
+        log_skips = logging.getLogger().isEnabledFor(logging.DEBUG)
+        existing = self.existing_ids()
+        # Duplicates within this input are tracked separately; existing only learns ids once add() succeeds
+        seen = set()
 
-        for entry in tqdm(embeddings, desc="📥 Adding to ChromaDB"):
+        for entry in embeddings:
             chunk_id = entry["chunk_id"]
-            vector = entry["embedding"]
-            document = entry["text"]
-            metadata = {
-                "title": entry["title"],
-                "source": entry["source"],
-                "text": entry["text"]
-            }
 
             # ✅ **Check if chunk already exists before adding**
-            if self.chunk_exists(chunk_id):
-                logging.info(f"⏭️  Skipping {chunk_id}, already in DB.")
+            if chunk_id in existing or chunk_id in seen:
+                if log_skips:
+                    logging.debug("⏭️  Skipping %s, already in DB.", chunk_id)
                 skipped += 1
                 continue
 
+            new_entries.append(entry)
+            seen.add(chunk_id)
+
+        for start in tqdm(range(0, len(new_entries), batch_size), desc="📥 Adding to ChromaDB"):
+            batch = new_entries[start:start + batch_size]
+            ids = [entry["chunk_id"] for entry in batch]
             # Add to ChromaDB
-            self.collection.add(ids=[chunk_id], embeddings=[vector], documents=[document], metadatas=[metadata])
-            added += 1
-
-        logging.info(f"✅ Added {added} new chunks, Skipped {skipped} existing chunks.")
-
-    def process_files(self):
-        """Processes all JSONL files in the input directory."""
-        files = [f for f in os.listdir(self.input_dir) if f.endswith(".jsonl")]
-        for file in files:
-            filepath = os.path.join(self.input_dir, file)
-            logging.info(f"🔍 Processing {file} for vector storage...")
-
-            embeddings = self.load_jsonl(filepath)
-            if embeddings:
-                self.add_to_vector_db(embeddings)
-                logging.info(f"✅ Processed {len(embeddings)} embeddings from {file}")
+            self.collection.add(
+                ids=ids,
+                embeddings=[entry["embedding"] for entry in batch],
+                documents=[entry["text"] for entry in batch],
+                metadatas=[
+                    {
+                        "title": entry["title"],
+                        "source": entry["source"],
+                        "text": entry["text"]
+                    }
+                    for entry in batch
+                ]
+            )
+            existing.update(ids)
+
+        logging.info(f"✅ Added {len(new_entries)} new chunks, Skipped {skipped} existing chunks.")
+
+    def process_files(self, max_workers=16):
+        """
+        Processes all JSONL files in the input directory.
+        Files are read and parsed max_workers at a time in a thread pool, then stored in order.
+        """
+        with os.scandir(self.input_dir) as entries:
+            files = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".jsonl")]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for start in range(0, len(files), max_workers):
+                window = files[start:start + max_workers]
+                loaded = executor.map(self.load_jsonl, [os.path.join(self.input_dir, file) for file in window])
+                for file, embeddings in zip(window, loaded):
+                    self._store_file(file, embeddings)
+
+    def _store_file(self, file, embeddings):
+        """Stores the embeddings loaded from one JSONL file."""
+        logging.info(f"🔍 Processing {file} for vector storage...")
+        if embeddings:
+            self.add_to_vector_db(embeddings)
+            logging.info(f"✅ Processed {len(embeddings)} embeddings from {file}")
 
     def run(self):
         """Runs the vector store process."""
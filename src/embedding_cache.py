@@ -0,0 +1,82 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache stored in SQLite.
+    Vectors are keyed by SHA-256(model + "\0" + text), so unchanged texts are never re-embedded across runs.
+    They are stored as float32, so a cache hit returns exactly the vector a fresh embedding call would.
+    One instance may be shared across threads: the connection is used under a lock.
+    """
+
+    # Stay well below SQLite's limit on bound parameters per statement
+    _MAX_PARAMS = 500
+
+    def __init__(self, db_path="data/embeddings/embed_cache.sqlite", model=""):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            db_path (str): Path to the SQLite file.
+            model (str): Embedding model name; part of every key so models never share vectors.
+        """
+        self.db_path = db_path
+        self.model = model
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Evaluators and async retrieval call the cache from worker threads, so the connection is not
+        # tied to the thread that opened it and every use goes through self._lock instead
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, model TEXT, vec BLOB)"
+        )
+        self.conn.commit()
+
+    def key(self, text):
+        """Returns the cache key for a text under this cache's model."""
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, texts):
+        """Returns {text: embedding (list of floats)} for every text found in the cache."""
+        keys = {}
+        for text in texts:
+            keys.setdefault(self.key(text), text)
+
+        found = {}
+        key_list = list(keys)
+        for start in range(0, len(key_list), self._MAX_PARAMS):
+            batch = key_list[start:start + self._MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT hash, vec FROM embeddings WHERE hash IN ({placeholders})", batch
+                ).fetchall()
+            for key, vec in rows:
+                found[keys[key]] = np.frombuffer(vec, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items):
+        """Stores (text, embedding) pairs in a single transaction."""
+        rows = [
+            (self.key(text), self.model, np.asarray(embedding, dtype=np.float32).tobytes())
+            for text, embedding in items
+        ]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, model, vec) VALUES (?, ?, ?)", rows
+            )
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            self.conn.close()
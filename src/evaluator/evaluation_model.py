@@ -1,6 +1,7 @@
 import openai
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 from src.log_manager import setup_logger
@@ -51,6 +52,12 @@ class LMStudioEvaluationModel:
         self.api_url = api_url
         # self.model = model
 
+        # Keep-alive connections are reused across prompts; retries stay in evaluate()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
     def evaluate(self, prompt: str) -> str:
         payload = {
             "messages": [{"role": "user", "content": prompt}]
@@ -61,7 +68,7 @@ class LMStudioEvaluationModel:
 
         for attempt in range(retries):
             try:
-                response = requests.post(self.api_url, json=payload, timeout=15)
+                response = self.session.post(self.api_url, json=payload, timeout=15)
                 if response.status_code == 200:
                     content = response.json()['choices'][0]['message']['content'].strip()
                     logger.info("[LMStudio] Prompt succeeded.")
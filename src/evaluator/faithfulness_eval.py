@@ -1,10 +1,12 @@
+import asyncio
 import json
 import os
+import re
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 from rouge_score import rouge_scorer 
 from src.pipeline.retriever import Retriever
+from src.pipeline.embeddings import cos_sim_norm, get_bge
 from src.pipeline.generator import Generator
 from src.evaluator.logging import EvaluationLogger
 from src.evaluator.evaluation_model import EvaluationModel
@@ -14,6 +16,8 @@ from bert_score import score as bert_score
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+_SCORE_RE = re.compile(r"\d+(?:\.\d+)?")
+
 class FaithfulnessEvaluator:
     """
     Evaluates the faithfulness of LLM-generated responses by checking retrieval consistency and grounding.
@@ -26,7 +30,7 @@ class FaithfulnessEvaluator:
         self.retriever = retriever
         self.generator = generator
         self.logger = EvaluationLogger(eval_type="faithfulness")
-        self.model = SentenceTransformer(embedding_model)  # ✅ Now using `bge-base-en`
+        self.model = get_bge(embedding_model)  # ✅ Now using `bge-base-en`
         self.rouge_scorer = rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)  # ✅ ROUGE-L Scorer
 
         self.evaluation_method = evaluation_method
@@ -44,18 +48,18 @@ class FaithfulnessEvaluator:
             return None
 
         # ✅ Generate answer ONCE
-        generated_answer = self.generator.generate_response(query, retrieved_chunks, [])
+        generated_answer, _ = self.generator.generate_response(query, retrieved_chunks, [])
 
-        # ✅ Compute faithfulness metrics
-        blobwise_answer_similarity = self.compute_blobwise_similarity(query, retrieved_chunks, generated_answer)
-        chunkwise_answer_similarity = self.compute_chunkwise_similarity(generated_answer, retrieved_chunks)
-        faithful_coverage = self.compute_faithful_coverage(query, ground_truth_answer, generated_answer)
+        # ✅ Compute faithfulness metrics (answer, blob and chunks embedded in one encode call)
+        embeddings = self.precompute(retrieved_chunks, generated_answer)
+        blobwise_answer_similarity = self.compute_blobwise_similarity(query, retrieved_chunks, generated_answer, embeddings)
+        chunkwise_answer_similarity = self.compute_chunkwise_similarity(generated_answer, retrieved_chunks, embeddings)
+        faithful_coverage = self.compute_faithful_coverage(ground_truth_answer, generated_answer)
         # negative_faithfulness = self.compute_negative_faithfulness(query, retrieved_chunks, generated_answer)
 
         # ✅ Compute LLM-based faithfulness metrics
         try:
-            faithfulness_llm = self.llm_as_judge(query, retrieved_chunks, generated_answer)
-            faithful_coverage_llm = self.llm_faithful_coverage(query, ground_truth_answer, generated_answer)
+            faithfulness_llm, faithful_coverage_llm = self.llm_scores(query, ground_truth_answer, retrieved_chunks, generated_answer)
         except Exception as e:
             print(f"❌ Error generating response: {str(e)}")
             faithfulness_llm = "FDTKE"
@@ -84,26 +88,44 @@ class FaithfulnessEvaluator:
 
     # ✅ NON-LLM BASED METHODS
 
-    def compute_blobwise_similarity(self, query, retrieved_chunks, generated_answer):
+    def precompute(self, retrieved_chunks, generated_answer, chunk_embeddings=None):
+        """
+        Embeds the generated answer, the joined chunks and each chunk in a single encode call.
+        The result can be passed to compute_blobwise_similarity and compute_chunkwise_similarity.
+        Pass the chunks' stored embeddings (Retriever.query_batch with_embeddings) to skip re-encoding them.
+        """
+        if chunk_embeddings is not None and len(chunk_embeddings) == len(retrieved_chunks):
+            vectors = self.model.encode([generated_answer, " ".join(retrieved_chunks)], normalize_embeddings=True)
+            return {"answer": vectors[0:1], "blob": vectors[1:2], "chunks": chunk_embeddings}
+
+        texts = [generated_answer, " ".join(retrieved_chunks), *retrieved_chunks]
+        vectors = self.model.encode(texts, batch_size=32, normalize_embeddings=True)
+        return {"answer": vectors[0:1], "blob": vectors[1:2], "chunks": vectors[2:]}
+
+    def compute_blobwise_similarity(self, query, retrieved_chunks, generated_answer, embeddings=None):
         """
         Measures the cosine similarity between the generated answer and the concatenated retrieved chunks.
         """
-        answer_embedding = self.model.encode([generated_answer], normalize_embeddings=True)
-        retrieved_embedding = self.model.encode([" ".join(retrieved_chunks)], normalize_embeddings=True)
+        if embeddings is None:
+            embeddings = self.precompute(retrieved_chunks, generated_answer)
+        answer_embedding = embeddings["answer"]
+        retrieved_embedding = embeddings["blob"]
 
-        similarity_score = float(cosine_similarity(answer_embedding, retrieved_embedding)[0][0]) * 10  # ✅ Scaled to 0-10
+        similarity_score = float(cos_sim_norm(answer_embedding, retrieved_embedding)[0][0]) * 10  # ✅ Scaled to 0-10
 
         return similarity_score
-    def compute_chunkwise_similarity(self, generated_answer: str, retrieved_chunks: list) -> dict:
+    def compute_chunkwise_similarity(self, generated_answer: str, retrieved_chunks: list, embeddings=None) -> dict:
         """Computes cosine similarity between the generated answer and each retrieved chunk, returns avg and max."""
         if not retrieved_chunks:
             print("⚠️ No retrieved chunks for chunkwise similarity.")
             return {"avg_chunkwise_score": 0.0, "max_chunkwise_score": 0.0}
 
-        answer_embedding = self.model.encode([generated_answer], normalize_embeddings=True)
-        chunk_embeddings = self.model.encode(retrieved_chunks, normalize_embeddings=True)
+        if embeddings is None:
+            embeddings = self.precompute(retrieved_chunks, generated_answer)
+        answer_embedding = embeddings["answer"]
+        chunk_embeddings = embeddings["chunks"]
 
-        similarities = cosine_similarity(answer_embedding, chunk_embeddings)[0]
+        similarities = cos_sim_norm(answer_embedding, chunk_embeddings)[0]
         similarities = [float(sim * 10) for sim in similarities]
 
         avg_score = sum(similarities) / len(similarities)
@@ -205,12 +227,23 @@ class FaithfulnessEvaluator:
         response = self.evaluation_method.evaluate(prompt)
         return self._parse_llm_score(response)
 
+    async def llm_scores_async(self, query, ground_truth_answer, retrieved_chunks, generated_answer):
+        """Runs llm_as_judge and llm_faithful_coverage concurrently; returns (faithfulness, coverage)."""
+        faithfulness_llm, faithful_coverage_llm = await asyncio.gather(
+            asyncio.to_thread(self.llm_as_judge, query, retrieved_chunks, generated_answer),
+            asyncio.to_thread(self.llm_faithful_coverage, query, ground_truth_answer, generated_answer),
+        )
+        return faithfulness_llm, faithful_coverage_llm
+
+    def llm_scores(self, query, ground_truth_answer, retrieved_chunks, generated_answer):
+        """Synchronous wrapper around llm_scores_async."""
+        return asyncio.run(self.llm_scores_async(query, ground_truth_answer, retrieved_chunks, generated_answer))
+
     # ✅ Helper Functions
     def _parse_llm_score(self, response):
         """Extracts numerical score from LLM response."""
         try:
             return float(response.strip())
         except ValueError:
-            import re
-            match = re.search(r"(\d+(\.\d+)?)", response.text)
-            return float(match.group(1)) if match else -1
+            match = _SCORE_RE.search(response)
+            return float(match.group(0)) if match else -1
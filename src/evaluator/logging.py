@@ -1,22 +1,42 @@
+import atexit
 import json
 import os
+import time
+import weakref
+import orjson
 import pandas as pd
 from openpyxl import load_workbook
 import logging
 from src.log_manager import setup_logger
 
+# Loggers with possibly unflushed entries; one exit hook flushes them all without keeping them alive
+_live_loggers = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_loggers():
+    for evaluation_logger in list(_live_loggers):
+        evaluation_logger.flush()
+
+
 class EvaluationLogger:
     """
     A helper class to log evaluation results to JSON and Excel files in a proper tabular format.
     """
 
-    def __init__(self, eval_type="retrieval", json_path=None, excel_path=None, log_file=None):
+    def __init__(self, eval_type="retrieval", json_path=None, excel_path=None, log_file=None, buffer_size=25, flush_interval=60):
         """
         Initializes the logger.
         :param eval_type: "retrieval" or "faithfulness". Determines file naming.
         :param json_path: Optional custom JSON file path.
         :param excel_path: Optional custom Excel file path.
         :param log_file: Path for process tracking logs.
+        :param buffer_size: Number of entries kept in memory before they are written to the JSON file.
+        :param flush_interval: Seconds after which buffered entries are written on the next log call, even if the buffer is not full.
+
+        Buffered entries are also written before Excel export and at a clean interpreter exit, but a killed
+        or crashed process loses them: at most buffer_size entries, or flush_interval seconds of results.
+        Use buffer_size=1 to write every entry as soon as it is logged.
         """
         self.eval_type = eval_type.lower()
         self.json_path = json_path or f"data/evaluation_results/{self.eval_type}_evaluation.json"
@@ -27,40 +47,72 @@ class EvaluationLogger:
         # Ensure data directory exists
         os.makedirs(os.path.dirname(self.json_path), exist_ok=True)
 
+        # Entries waiting to be written; flushed when full, before Excel export and at exit
+        self.buffer_size = max(1, buffer_size)
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        _live_loggers.add(self)
+
     def log(self, data):
         """Logs data to JSON and Excel files."""
         self.log_to_json(data)
         self.log_to_process_file(f"Logged data for query: {data.get('query', '')}")
     
     def log_to_json(self, data):
-        """Appends evaluation data to the JSON file."""
+        """Buffers evaluation data and writes it to the JSON file once the buffer is full."""
+        # Avoid duplicate query entries
+        if self._buffer and self._buffer[-1].get("query") == data.get("query"):
+            self._buffer[-1].update(data)
+        else:
+            self._buffer.append(data)
+
+        if len(self._buffer) >= self.buffer_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Appends all buffered entries to the JSON file in a single write."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
         if os.path.exists(self.json_path):
-            with open(self.json_path, "r") as f:
+            with open(self.json_path, "rb") as f:
                 try:
-                    existing_data = json.load(f)
+                    existing_data = orjson.loads(f.read())
                 except json.JSONDecodeError:
                     existing_data = []  # Reset if file is corrupted
         else:
             existing_data = []
 
-        # Avoid duplicate query entries
-        if existing_data and existing_data[-1].get("query") == data.get("query"):
-            existing_data[-1].update(data)
-        else:
-            existing_data.append(data)
+        buffered, self._buffer = self._buffer, []
+
+        # Avoid duplicate query entries across the file/buffer boundary
+        if existing_data and existing_data[-1].get("query") == buffered[0].get("query"):
+            existing_data[-1].update(buffered.pop(0))
+        existing_data.extend(buffered)
+
+        # OPT_SERIALIZE_NUMPY: metric values may still be NumPy scalars
+        with open(self.json_path, "wb") as f:
+            f.write(orjson.dumps(existing_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
-        with open(self.json_path, "w") as f:
-            json.dump(existing_data, f, indent=2)
+    def __del__(self):
+        # A logger dropped before exit still writes what it buffered
+        try:
+            self.flush()
+        except Exception:
+            pass
 
     def log_to_excel(self):
         """Converts JSON log into Excel (one-time batch process)."""
+        self.flush()
         if not os.path.exists(self.json_path):
             self.log_to_process_file("No JSON data found for writing to Excel.")
             return
 
-        with open(self.json_path, "r") as f:
+        with open(self.json_path, "rb") as f:
             try:
-                data = json.load(f)
+                data = orjson.loads(f.read())
             except json.JSONDecodeError:
                 self.log_to_process_file("Failed to parse JSON data.")
                 return
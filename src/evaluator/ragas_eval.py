@@ -13,6 +13,7 @@ from langchain.llms.base import LLM
 from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.callbacks.manager import CallbackManagerForLLMRun
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import json
 import pandas as pd
@@ -24,6 +25,12 @@ logger = setup_logger("logs/ragas_eval.log")
 
 my_embeddings = HuggingFaceEmbeddings(model_name="BAAI/bge-base-en")
 
+# Shared keep-alive session for LM Studio calls; retries stay in LMStudioLLM._call
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
 class LMStudioLLM(LLM):
     """LangChain-compatible LLM wrapper for LM Studio"""
     
@@ -57,7 +64,7 @@ class LMStudioLLM(LLM):
         delay = 1
         for attempt in range(self.max_retries):
             try:
-                response = requests.post(self.api_url, json=payload, timeout=self.timeout)
+                response = _session.post(self.api_url, json=payload, timeout=self.timeout)
                 if response.status_code == 200:
                     content = response.json()["choices"][0]["message"]["content"].strip()
                     logger.info("[LMStudio] Prompt succeeded.")
@@ -1,7 +1,10 @@
+import asyncio
 import json
-from sentence_transformers import SentenceTransformer
+import re
 from sklearn.metrics.pairwise import cosine_similarity
 from src.pipeline.retriever import Retriever
+from src.pipeline.embeddings import cos_sim_norm, encode_normalized, get_bge
+from src.embedding_cache import EmbeddingCache
 from src.evaluator.logging import EvaluationLogger
 from src.pipeline.generator import Generator  
 import numpy as np
@@ -14,6 +17,9 @@ from bert_score import score
 
 # Set up logger for test run
 global_logger = setup_logger("logs/retrieval_process.log")
+
+_SCORE_RE = re.compile(r"\d+(?:\.\d+)?")
+
 class RetrievalEvaluator:
     """
     Evaluates the retrieval system of the RAG pipeline using:
@@ -25,15 +31,23 @@ class RetrievalEvaluator:
     - LLM-based versions of the above metrics
     """
     
-    def __init__(self, retriever : Retriever, generator : Generator,evaluation_model: EvaluationModel, embedding_model="BAAI/bge-base-en"):
+    def __init__(self, retriever : Retriever, generator : Generator,evaluation_model: EvaluationModel, embedding_model="BAAI/bge-base-en",
+                 cache_path=None):
         """
         Initializes Retrieval Evaluator with BGE embeddings and LLM.
+        cache_path names an SQLite file that keeps batch embeddings (queries, ground truths, joined chunks)
+        across runs; None disables it.
         """
         self.retriever = retriever
         self.generator = generator
-        self.model = SentenceTransformer(embedding_model)
+        self.model = get_bge(embedding_model)
+        self.embedding_cache = EmbeddingCache(cache_path, model=embedding_model) if cache_path else None
         self.logger = EvaluationLogger(eval_type="retrieval")
         self.rouge_scorer = rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)
+        self.recall_rouge_scorer = rouge_scorer.RougeScorer(["rouge1"], use_stemmer=True)
+
+        # Last (joined_text, embedding) pair; precision and recall of the same row share one encode
+        self._joined_cache = (None, None)
 
         self.evaluation_model = evaluation_model
 
@@ -46,31 +60,14 @@ class RetrievalEvaluator:
 
         # Cosine similarity part (unchanged)
         query_embedding = self.model.encode([query], normalize_embeddings=True)
-        retrieved_embedding = self.model.encode([" ".join(retrieved_chunks)], normalize_embeddings=True)
-        cosine_score = float(cosine_similarity(query_embedding, retrieved_embedding)[0][0]) * 10
+        retrieved_embedding = self._encode_joined(retrieved_chunks)
+        cosine_score = float(cos_sim_norm(query_embedding, retrieved_embedding)[0][0]) * 10
 
         # BM25 computation
-        tokenized_chunks = [chunk.split() for chunk in retrieved_chunks]
-        tokenized_query = query.split()
-        bm25 = BM25Okapi(tokenized_chunks)
-        bm25_scores = bm25.get_scores(tokenized_query)
-
-        # Min-max normalization of BM25 scores
-        min_score = min(bm25_scores)
-        max_score = max(bm25_scores)
-        
-        if max_score == min_score:
-            # Avoid division by zero: if all scores are equal, set normalized score to 10 if they are relevant, else 0.
-            normalized_scores = [10 for _ in bm25_scores]
-        else:
-            normalized_scores = [
-                10 * (score - min_score) / (max_score - min_score) for score in bm25_scores
-            ]
-        
-        bm25_avg_score = sum(normalized_scores) / len(normalized_scores)
+        bm25_avg_score = self._bm25_average_score(query, retrieved_chunks)
         
         precision_score = (cosine_score + bm25_avg_score) / 2
-        global_logger.info(f"📊 Context Precision Score (Cosine + BM25): {precision_score:.2f}")
+        global_logger.info("📊 Context Precision Score (Cosine + BM25): %.2f", precision_score)
 
         return {
             "cosine_score": round(cosine_score, 2),
@@ -86,13 +83,12 @@ class RetrievalEvaluator:
             return 0.0
 
         # Cosine similarity for semantic recall
-        retrieved_embedding = self.model.encode([" ".join(retrieved_chunks)], normalize_embeddings=True)
+        retrieved_embedding = self._encode_joined(retrieved_chunks)
         ground_truth_embedding = self.model.encode([ground_truth_answer], normalize_embeddings=True)
-        recall_score_cosine = float(cosine_similarity(ground_truth_embedding, retrieved_embedding)[0][0]) * 10
+        recall_score_cosine = float(cos_sim_norm(ground_truth_embedding, retrieved_embedding)[0][0]) * 10
 
         # ROUGE-N for exact overlap (ROUGE-1 for unigrams)
-        scorer = rouge_scorer.RougeScorer(["rouge1", "rouge2", "rougeL"], use_stemmer=True)
-        rouge_scores = scorer.score(ground_truth_answer, " ".join(retrieved_chunks))
+        rouge_scores = self.recall_rouge_scorer.score(ground_truth_answer, " ".join(retrieved_chunks))
 
         # Retrieve the ROUGE-1 F-measure score (for unigrams)
         rouge_n_score = rouge_scores["rouge1"].fmeasure * 10  # Scaling to 0-10
@@ -103,11 +99,70 @@ class RetrievalEvaluator:
 
         # Combine Cosine, ROUGE-N, and BERTScore
         recall_score = (recall_score_cosine + rouge_n_score + bert_score) / 3
-        global_logger.info(f"📊 Context Recall Score (Cosine + ROUGE + BERTScore): {recall_score:.2f}")
+        global_logger.info("📊 Context Recall Score (Cosine + ROUGE + BERTScore): %.2f", recall_score)
         return recall_score
 
-
-    def compute_context_precision_chunkwise(self, query, retrieved_chunks, threshold=0.3):
+    def evaluate_many(self, rows):
+        """
+        Computes context precision and context recall for many rows at once.
+        Each row is a (query, ground_truth_answer, retrieved_chunks) tuple. Queries, ground truths and
+        joined chunks are each encoded in one batch, and the cosine terms come from one row-wise dot
+        product per pair instead of per-row encode calls. Returns a list of
+        {"context_precision": {...}, "context_recall": float} dicts in row order.
+        """
+        results = [
+            {
+                "context_precision": {"cosine_score": 0.0, "bm25_score": 0.0, "combined_precision_score": 0.0},
+                "context_recall": 0.0
+            }
+            for _ in rows
+        ]
+        valid = [idx for idx, (_, _, retrieved_chunks) in enumerate(rows) if retrieved_chunks]
+        if len(valid) < len(rows):
+            global_logger.warning("⚠️ %d rows without retrieved chunks scored as 0.", len(rows) - len(valid))
+        if not valid:
+            return results
+
+        queries = [rows[idx][0] for idx in valid]
+        ground_truths = [rows[idx][1] for idx in valid]
+        joined_chunks = [" ".join(rows[idx][2]) for idx in valid]
+
+        query_matrix = self._encode_batch(queries)
+        ground_truth_matrix = self._encode_batch(ground_truths)
+        chunk_matrix = self._encode_batch(joined_chunks)
+
+        # Embeddings are L2-normalized, so the row-wise dot product is the cosine similarity
+        precision_cosine = np.einsum("ij,ij->i", query_matrix, chunk_matrix) * 10
+        recall_cosine = np.einsum("ij,ij->i", ground_truth_matrix, chunk_matrix) * 10
+
+        # BERTScore for all rows in one call
+        _, _, F1 = score(ground_truths, joined_chunks, lang='en')
+        bert_scores = F1.numpy() * 10
+
+        for pos, idx in enumerate(valid):
+            query, ground_truth_answer, retrieved_chunks = rows[idx]
+
+            cosine_score = float(precision_cosine[pos])
+            bm25_avg_score = self._bm25_average_score(query, retrieved_chunks)
+            precision_score = (cosine_score + bm25_avg_score) / 2
+
+            rouge_n_score = self.recall_rouge_scorer.score(ground_truth_answer, joined_chunks[pos])["rouge1"].fmeasure * 10
+            recall_score = (float(recall_cosine[pos]) + rouge_n_score + float(bert_scores[pos])) / 3
+
+            results[idx] = {
+                "context_precision": {
+                    "cosine_score": round(cosine_score, 2),
+                    "bm25_score": round(bm25_avg_score, 2),
+                    "combined_precision_score": round(precision_score, 2)
+                },
+                "context_recall": recall_score
+            }
+
+        global_logger.info("📊 Batch evaluated %d rows (Cosine + BM25 + ROUGE + BERTScore)", len(valid))
+        return results
+
+
+    def compute_context_precision_chunkwise(self, query, retrieved_chunks, threshold=0.3, chunk_embeddings=None):
         """
         Chunk-level Context Precision:
         1. For each retrieved chunk, compute its cosine similarity with the query.
@@ -127,13 +182,9 @@ class RetrievalEvaluator:
         # Encode the query once
         query_embedding = np.array(self.model.encode([query], normalize_embeddings=True))
 
-        # --- Cosine-based precision ---
-        relevant_cosine_count = 0
-        for chunk in retrieved_chunks:
-            chunk_embedding = np.array(self.model.encode([chunk], normalize_embeddings=True))
-            cos_sim = float(cosine_similarity(query_embedding, chunk_embedding)[0][0])
-            if cos_sim >= threshold:
-                relevant_cosine_count += 1
+        # --- Cosine-based precision (all chunks encoded in one batch, scored with one matmul) ---
+        cos_sims = cos_sim_norm(query_embedding, self._chunk_matrix(retrieved_chunks, chunk_embeddings))[0]
+        relevant_cosine_count = int(np.count_nonzero(cos_sims >= threshold))
         cosine_precision_fraction = relevant_cosine_count / len(retrieved_chunks)
         chunkwise_cosine_precision = cosine_precision_fraction * 10.0  # scale to 0-10
 
@@ -157,9 +208,9 @@ class RetrievalEvaluator:
         combined_precision_fraction = (cosine_precision_fraction + bm25_precision_fraction) / 2
         combined_precision = combined_precision_fraction * 10.0
 
-        global_logger.info(f"Chunkwise Cosine Precision (0-10): {chunkwise_cosine_precision:.2f}")
-        global_logger.info(f"Chunkwise BM25 Precision (0-10): {chunkwise_bm25_precision:.2f}")
-        global_logger.info(f"Combined Chunkwise Precision (0-10): {combined_precision:.2f}")
+        global_logger.info("Chunkwise Cosine Precision (0-10): %.2f", chunkwise_cosine_precision)
+        global_logger.info("Chunkwise BM25 Precision (0-10): %.2f", chunkwise_bm25_precision)
+        global_logger.info("Combined Chunkwise Precision (0-10): %.2f", combined_precision)
 
         return {
             "chunkwise_cosine_precision": round(chunkwise_cosine_precision, 2),
@@ -168,7 +219,7 @@ class RetrievalEvaluator:
         }
 
 
-    def compute_context_recall_chunkwise(self, query, ground_truth_answer, retrieved_chunks, threshold=0.3):
+    def compute_context_recall_chunkwise(self, query, ground_truth_answer, retrieved_chunks, threshold=0.3, chunk_embeddings=None):
         """
         Chunk-level Context Recall:
         1. Treat the entire ground truth as one claim.
@@ -181,16 +232,13 @@ class RetrievalEvaluator:
             return 0.0
 
         gt_embedding = np.array(self.model.encode([ground_truth_answer], normalize_embeddings=True))
-        similarities = []
-        for chunk in retrieved_chunks:
-            chunk_embedding = np.array(self.model.encode([chunk], normalize_embeddings=True))
-            cos_sim = float(cosine_similarity(gt_embedding, chunk_embedding)[0][0])
-            similarities.append(cos_sim)
+        # All chunks encoded in one batch and scored with one matmul
+        similarities = [float(sim) for sim in cos_sim_norm(gt_embedding, self._chunk_matrix(retrieved_chunks, chunk_embeddings))[0]]
 
         avg_similarity = sum(similarities) / len(similarities)
         recall_score = avg_similarity * 10  # scale to 0–10
 
-        global_logger.info(f"Chunkwise Context Recall (0-10): {recall_score:.2f}")
+        global_logger.info("Chunkwise Context Recall (0-10): %.2f", recall_score)
         return recall_score
 
 
@@ -248,11 +296,11 @@ class RetrievalEvaluator:
             response = self.evaluation_model.evaluate(prompt)
             score = self._parse_llm_score(response)
 
-            global_logger.info(f"📊 Context Precision Score (LLM): {score:.2f}")
+            global_logger.info("📊 Context Precision Score (LLM): %.2f", score)
             return score
 
         except Exception as e:
-            global_logger.error(f"❌ Error generating response: {str(e)}")
+            global_logger.error("❌ Error generating response: %s", e)
             return self._handle_llm_exception(e)
 
     def compute_context_recall_with_llm(self, query, ground_truth_answer, retrieved_chunks):
@@ -288,11 +336,11 @@ class RetrievalEvaluator:
             response = self.evaluation_model.evaluate(prompt)
             score = self._parse_llm_score(response)
 
-            global_logger.info(f"📊 Context Recall Score (LLM): {score:.2f}")
+            global_logger.info("📊 Context Recall Score (LLM): %.2f", score)
             return score
 
         except Exception as e:
-            global_logger.error(f"❌ Error generating response: {str(e)}")
+            global_logger.error("❌ Error generating response: %s", e)
             return self._handle_llm_exception(e)
 
     def compute_retrieval_precision_with_llm(self, query, retrieved_chunks):
@@ -327,11 +375,11 @@ class RetrievalEvaluator:
             response = self.evaluation_model.evaluate(prompt)
             score = self._parse_llm_score(response)
 
-            global_logger.info(f"📊 Retrieval Precision Score (LLM): {score:.2f}")
+            global_logger.info("📊 Retrieval Precision Score (LLM): %.2f", score)
             return score
 
         except Exception as e:
-            global_logger.error(f"❌ Error generating response: {str(e)}")
+            global_logger.error("❌ Error generating response: %s", e)
             return self._handle_llm_exception(e)
 
     # ✅ CONTEXT OVERLAP SCORE (ROUGE-L)
@@ -448,22 +496,153 @@ class RetrievalEvaluator:
             response = self.evaluation_model.evaluate(prompt)
             score = self._parse_llm_score(response)
 
-            global_logger.info(f"📊 Negative Retrieval Score (LLM): {score:.2f}")
+            global_logger.info("📊 Negative Retrieval Score (LLM): %.2f", score)
             return score
 
         except Exception as e:
-            global_logger.error(f"❌ Error generating response: {str(e)}")
+            global_logger.error("❌ Error generating response: %s", e)
             return self._handle_llm_exception(e)
 
+    # ✅ LLM-BASED METRICS BUNDLE (single judge call per row)
+    def compute_llm_metrics_bundle(self, query, ground_truth_answer, retrieved_chunks):
+        """
+        Uses one LLM call to score context precision, context recall, retrieval precision
+        and negative retrieval together. Returns a dict keyed by metric name.
+        """
+        metric_names = ["context_precision", "context_recall", "retrieval_precision", "negative_retrieval"]
+        if not retrieved_chunks:
+            global_logger.warning("⚠️ No retrieved chunks for LLM evaluation.")
+            return {name: "Error" for name in metric_names}
+
+        try:
+            prompt = f"""
+            You are an expert judge evaluating retrieval quality.
+
+            You are given:
+            <query>
+            {query}
+            </query>
+
+            <ground_truth_answer>
+            {ground_truth_answer}
+            </ground_truth_answer>
+
+            <retrieved_chunks>
+            {retrieved_chunks}
+            </retrieved_chunks>
+
+            Score each of the following on an integer scale from 0 to 10:
+
+            • "context_precision": how precisely the retrieved chunks match the query.
+              10 if all chunks are perfectly relevant, 5 if about half are relevant, 0 if none are relevant.
+            • "context_recall": how comprehensively the retrieved chunks cover the details of the ground truth answer.
+              10 if all details are covered, 5 if only some details are covered, 0 if none are covered.
+            • "retrieval_precision": whether the retrieved content stays strictly focused on the query.
+              10 if the chunks ONLY contain relevant information, 5 if about half include unnecessary content, 0 if most is off-topic.
+            • "negative_retrieval": how many of the retrieved chunks are completely unrelated to the query.
+              0 if all chunks are clearly relevant, 5 if about half are off-topic, 10 if most or all are irrelevant.
+
+            Respond strictly with a single JSON object and no additional text, for example:
+            {{"context_precision": 7, "context_recall": 5, "retrieval_precision": 8, "negative_retrieval": 1}}
+            """
+            response = self.evaluation_model.evaluate(prompt)
+            scores = self._parse_llm_json(response)
+
+            bundle = {}
+            for name in metric_names:
+                try:
+                    bundle[name] = float(scores[name])
+                except (KeyError, TypeError, ValueError):
+                    bundle[name] = -1
+            global_logger.info("📊 LLM Metrics Bundle: %s", bundle)
+            return bundle
+
+        except Exception as e:
+            global_logger.error("❌ Error generating response: %s", e)
+            fallback = self._handle_llm_exception(e)
+            return {name: fallback for name in metric_names}
+
+    async def compute_llm_metrics_many_async(self, rows, max_concurrency=16):
+        """
+        Runs compute_llm_metrics_bundle for many (query, ground_truth_answer, retrieved_chunks) rows
+        concurrently in worker threads, at most max_concurrency judge calls in flight.
+        Returns one bundle per row, in row order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(query, ground_truth_answer, retrieved_chunks):
+            async with semaphore:
+                return await asyncio.to_thread(self.compute_llm_metrics_bundle, query, ground_truth_answer, retrieved_chunks)
+
+        return await asyncio.gather(*(bounded(*row) for row in rows))
+
+    def compute_llm_metrics_many(self, rows, max_concurrency=16):
+        """Synchronous wrapper around compute_llm_metrics_many_async."""
+        return asyncio.run(self.compute_llm_metrics_many_async(rows, max_concurrency))
+
     # ✅ Helper Functions
+    def _encode_batch(self, texts):
+        """Encodes texts in one batch into a float32 matrix of L2-normalized rows, reusing cached vectors."""
+        return encode_normalized(self.model, texts, self.embedding_cache)
+
+    def _chunk_matrix(self, retrieved_chunks, chunk_embeddings=None):
+        """Per-chunk embeddings: the stored ones when given (Retriever.query_batch with_embeddings), else one batch encode."""
+        if chunk_embeddings is not None and len(chunk_embeddings) == len(retrieved_chunks):
+            return chunk_embeddings
+        return self._encode_batch(retrieved_chunks)
+
+    def _encode_joined(self, retrieved_chunks):
+        """Encodes the space-joined chunks, reusing the previous result when the row's chunks are unchanged."""
+        joined_text = " ".join(retrieved_chunks)
+        cached_text, cached_embedding = self._joined_cache
+        if cached_text == joined_text:
+            return cached_embedding
+        embedding = self.model.encode([joined_text], normalize_embeddings=True)
+        self._joined_cache = (joined_text, embedding)
+        return embedding
+
+    def _bm25_average_score(self, query, retrieved_chunks):
+        """Average min-max normalized BM25 score (0-10) of the chunks against the query."""
+        tokenized_chunks = [chunk.split() for chunk in retrieved_chunks]
+        tokenized_query = query.split()
+        bm25 = BM25Okapi(tokenized_chunks)
+        bm25_scores = bm25.get_scores(tokenized_query)
+
+        # Min-max normalization of BM25 scores
+        min_score = min(bm25_scores)
+        max_score = max(bm25_scores)
+        
+        if max_score == min_score:
+            # Avoid division by zero: if all scores are equal, set normalized score to 10 if they are relevant, else 0.
+            normalized_scores = [10 for _ in bm25_scores]
+        else:
+            normalized_scores = [
+                10 * (score - min_score) / (max_score - min_score) for score in bm25_scores
+            ]
+        
+        return sum(normalized_scores) / len(normalized_scores)
+
+    def _parse_llm_json(self, response):
+        """Extracts a JSON object from an LLM response, tolerating surrounding text or code fences."""
+        try:
+            return json.loads(response.strip())
+        except ValueError:
+            start = response.find("{")
+            end = response.rfind("}")
+            if start == -1 or end <= start:
+                return {}
+            try:
+                return json.loads(response[start:end + 1])
+            except ValueError:
+                return {}
+
     def _parse_llm_score(self, response):
         """Extracts numerical score from LLM response."""
         try:
             return float(response.strip())
         except ValueError:
-            import re
-            match = re.search(r"(\d+(\.\d+)?)", response.text)
-            return float(match.group(1)) if match else -1
+            match = _SCORE_RE.search(response)
+            return float(match.group(0)) if match else -1
 
     def _log_with_llm_score(self, metric_name, query, llm_score):
         """Adds LLM-based scores to existing logged results."""
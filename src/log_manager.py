@@ -10,17 +10,20 @@ def setup_logger(log_path="logs/application.log", max_log_size=10 * 1024 * 1024,
     :param backup_count: Number of backup log files to keep.
     :return: Logger instance.
     """
+    # One logger per log file; repeated calls for the same path reuse it instead of stacking handlers
+    logger = logging.getLogger(f"ApplicationLogger.{log_path}")
+    if logger.handlers:
+        return logger
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
     # Ensure the log directory exists
     log_dir = os.path.dirname(log_path)
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
-    # Create a logger instance
-    logger = logging.getLogger("ApplicationLogger")
-    logger.setLevel(logging.INFO)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
 
-    # Create a rotating file handler
-    handler = RotatingFileHandler(log_path, maxBytes=max_log_size, backupCount=backup_count)
+    # Create a rotating file handler; the file is only opened on the first write
+    handler = RotatingFileHandler(log_path, maxBytes=max_log_size, backupCount=backup_count, delay=True)
     
     # Create a formatter
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -0,0 +1,51 @@
+import threading
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from src.log_manager import setup_logger
+
+logger = setup_logger("logs/embeddings.log")
+
+DEFAULT_EMBEDDING_MODEL = "BAAI/bge-base-en"
+
+# One SentenceTransformer per model name, shared by the retriever and the evaluators
+_cache = {}
+_lock = threading.Lock()
+
+
+def get_bge(model_name=DEFAULT_EMBEDDING_MODEL):
+    """Returns the shared SentenceTransformer for model_name, loading it on first use."""
+    model = _cache.get(model_name)
+    if model is None:
+        with _lock:
+            model = _cache.get(model_name)
+            if model is None:
+                model = SentenceTransformer(model_name)
+                _cache[model_name] = model
+                logger.info("🔄 Loaded embedding model: %s", model_name)
+    return model
+
+
+def cos_sim_norm(a, b):
+    """Cosine similarity matrix between the rows of a and b, which must already be L2-normalized."""
+    return np.asarray(a, dtype=np.float32) @ np.asarray(b, dtype=np.float32).T
+
+
+def encode_normalized(model, texts, cache=None, batch_size=32):
+    """
+    Encodes texts into a float32 matrix of L2-normalized rows.
+    With an EmbeddingCache, cached texts are not re-encoded and new vectors are stored in it.
+    """
+    if cache is None:
+        return model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32, copy=False)
+
+    cached = cache.get_many(texts)
+    # dict.fromkeys keeps first-seen order while dropping duplicate texts
+    missing = list(dict.fromkeys(text for text in texts if text not in cached))
+    new_vectors = {}
+    if missing:
+        vectors = model.encode(missing, batch_size=batch_size, normalize_embeddings=True, convert_to_numpy=True)
+        new_vectors = dict(zip(missing, vectors.astype(np.float32, copy=False)))
+        cache.put_many(new_vectors.items())
+    return np.array([cached[text] if text in cached else new_vectors[text] for text in texts], dtype=np.float32)
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -17,21 +18,13 @@ class Generator:
         self.model = genai.GenerativeModel(model_name)
         logger.info(f"✅ Generator initialized with model: {model_name}")
 
-    def generate_response(self, query, retrieved_chunks, retrieved_sources):
-        """Generates an LLM response based on retrieved knowledge chunks."""
-        logger.info(f"📝 Generating response for query: {query}")
-
-        if not retrieved_chunks:
-            return "⚠️ No relevant information found."
-
+    def _build_prompt(self, query, retrieved_chunks):
+        """Builds the grounded answer prompt from the retrieved chunks."""
         # Format retrieved context
         context = "\n\n".join([f"- {chunk}" for chunk in retrieved_chunks])
 
-        # Choose the most relevant source
-        source_url = retrieved_sources[0] if retrieved_sources else "https://minecraft.wiki"
-
         # Construct the prompt
-        prompt = f"""
+        return f"""
         You are a knowledgeable assistant trained on Minecraft Wiki.
         Answer strictly using the provided context.
         If required, structure the answer properly using bullet points, etc. If a crafting recipe is asked and you find it in the context then, make a 3x3 grid carefully as mentioned in the context to represent the recipe.
@@ -47,18 +40,79 @@ class Generator:
         If the context does not contain enough information, If the answer is clearly not present in the context just say "I don't know".
         """
 
+    def _format_response(self, gen_answer, retrieved_sources):
+        """Returns the raw answer and the answer with its source link appended."""
+        # Choose the most relevant source
+        source_url = retrieved_sources[0] if retrieved_sources else "https://minecraft.wiki"
+        if "I don't know" in gen_answer:
+            source_url = "https://minecraft.wiki"
+
+        final_response = ""
+        # Append source link
+        if source_url:
+            final_response = gen_answer + f"\n\n📌 *Read more at:* [Minecraft Wiki]({source_url})"
+
+        return gen_answer, final_response
+
+    def _message_response(self, message):
+        """Wraps a warning message in the same (gen_answer, response) shape as a generated answer."""
+        return message, message
+
+    def generate_response(self, query, retrieved_chunks, retrieved_sources):
+        """Generates an LLM response based on retrieved knowledge chunks."""
+        logger.info(f"📝 Generating response for query: {query}")
+
+        if not retrieved_chunks:
+            return self._message_response("⚠️ No relevant information found.")
+
+        prompt = self._build_prompt(query, retrieved_chunks)
+
         # Generate the response
         try:
-            final_response=""
             response = self.model.generate_content(prompt)
             gen_answer = response.text if response else "⚠️ No response generated."
-            if "I don't know" in gen_answer:
-                source_url = "https://minecraft.wiki"
-            # Append source link
-            if source_url:
-                final_response = gen_answer + f"\n\n📌 *Read more at:* [Minecraft Wiki]({source_url})"
+            return self._format_response(gen_answer, retrieved_sources)
+        except Exception as e:
+            logger.error(f"❌ Error generating response: {e}")
+            return self._message_response("⚠️ Error generating response.")
+
+    async def generate_response_async(self, query, retrieved_chunks, retrieved_sources):
+        """
+        Async, streaming variant of generate_response.
+        Awaiting the token stream yields the event loop, so other rows can retrieve while this one decodes.
+        """
+        logger.info(f"📝 Generating response (async) for query: {query}")
 
-            return gen_answer, final_response
+        if not retrieved_chunks:
+            return self._message_response("⚠️ No relevant information found.")
+
+        prompt = self._build_prompt(query, retrieved_chunks)
+
+        try:
+            response = await self.model.generate_content_async(prompt, stream=True)
+            parts = []
+            async for chunk in response:
+                parts.append(chunk.text)
+            gen_answer = "".join(parts) or "⚠️ No response generated."
+            return self._format_response(gen_answer, retrieved_sources)
         except Exception as e:
             logger.error(f"❌ Error generating response: {e}")
-            return "⚠️ Error generating response."
+            return self._message_response("⚠️ Error generating response.")
+
+    async def generate_many_async(self, queries, retrieved_chunks_list, retrieved_sources_list=None, max_concurrency=8):
+        """
+        Generates answers for many queries concurrently, at most max_concurrency requests in flight.
+        Returns (gen_answer, response) tuples in query order; a warning message fills both for failed rows.
+        """
+        if retrieved_sources_list is None:
+            retrieved_sources_list = [[] for _ in queries]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(query, retrieved_chunks, retrieved_sources):
+            async with semaphore:
+                return await self.generate_response_async(query, retrieved_chunks, retrieved_sources)
+
+        return await asyncio.gather(*(
+            bounded(query, retrieved_chunks, retrieved_sources)
+            for query, retrieved_chunks, retrieved_sources in zip(queries, retrieved_chunks_list, retrieved_sources_list)
+        ))
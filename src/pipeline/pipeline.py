@@ -1,6 +1,7 @@
+import asyncio
 import logging
-from pipeline.retriever import Retriever
-from pipeline.generator import Generator
+from src.pipeline.retriever import Retriever
+from src.pipeline.generator import Generator
 
 from src.log_manager import setup_logger
 
@@ -29,3 +30,30 @@ class RAGPipeline:
         gen_answer, response = self.generator.generate_response(query, retrieved_chunks, retrieved_sources)
         logger.info(f"✅ Response generated for query: {query}")
         return response
+
+    async def process_query_async(self, query):
+        """Async variant of process_query; returns (retrieved_chunks, gen_answer, response)."""
+        logger.info(f"📝 User Query (async): {query}")
+
+        retrieved_chunks, retrieved_sources = await self.retriever.query_async(query, top_k=5)
+        gen_answer, response = await self.generator.generate_response_async(query, retrieved_chunks, retrieved_sources)
+        logger.info(f"✅ Response generated for query: {query}")
+        return retrieved_chunks, gen_answer, response
+
+    async def process_queries_async(self, queries, max_concurrency=8):
+        """
+        Processes many queries concurrently, so one row's retrieval overlaps another row's generation.
+        Results are returned in the same order as the queries; a failed row yields empty chunks and a warning message.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(query):
+            async with semaphore:
+                try:
+                    return await self.process_query_async(query)
+                except Exception as e:
+                    # One failed row must not discard the rest of the batch
+                    logger.error(f"❌ Error processing query '{query}': {e}")
+                    return [], "⚠️ Error generating response.", "⚠️ Error generating response."
+
+        return await asyncio.gather(*(bounded(query) for query in queries))
@@ -1,8 +1,11 @@
 import os
+import asyncio
 import logging
 import chromadb
-from sentence_transformers import SentenceTransformer
+import numpy as np
 from src.log_manager import setup_logger
+from src.embedding_cache import EmbeddingCache
+from src.pipeline.embeddings import DEFAULT_EMBEDDING_MODEL, encode_normalized, get_bge
 
 # Set up logger for test run
 logger = setup_logger("logs/retriever.log")
@@ -10,14 +13,18 @@ logger = setup_logger("logs/retriever.log")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 class Retriever:
-    def __init__(self, db_path="data/vector_db", collection_name="minecraft_wiki"):
-        """Initialize the retriever with the vector database and embedding model."""
+    def __init__(self, db_path="data/vector_db", collection_name="minecraft_wiki", embedding_model_name=DEFAULT_EMBEDDING_MODEL,
+                 cache_path=None):
+        """
+        Initialize the retriever with the vector database and embedding model.
+        cache_path names an SQLite file that keeps batch query embeddings across runs; None disables it.
+        """
         self.client = chromadb.PersistentClient(path=db_path)
         self.collection = self.client.get_collection(name=collection_name)
 
-        # Load local embedding model
-        self.embedding_model = SentenceTransformer("BAAI/bge-base-en")
-        logger.info("🔄 Loaded embedding model: BAAI/bge-base-en")
+        # Local embedding model is shared and loaded on first query
+        self.embedding_model_name = embedding_model_name
+        self.embedding_cache = EmbeddingCache(cache_path, model=embedding_model_name) if cache_path else None
 
         # Check if embeddings exist
         total_embeddings = self.collection.count()
@@ -26,10 +33,17 @@ class Retriever:
         else:
             logger.info(f"✅ ChromaDB initialized with {total_embeddings} documents.")
 
+    @property
+    def embedding_model(self):
+        """Shared SentenceTransformer, loaded lazily."""
+        return get_bge(self.embedding_model_name)
+
     def get_embedding(self, text):
-        """Generate an embedding using the BGE model."""
+        """Generate an embedding using the BGE model, as a float32 NumPy vector."""
         try:
-            return self.embedding_model.encode(text, normalize_embeddings=True).tolist()
+            return self.embedding_model.encode(
+                text, normalize_embeddings=True, convert_to_numpy=True
+            ).astype(np.float32, copy=False)
         except Exception as e:
             logger.error(f"❌ Error generating embedding: {e}")
             return None
@@ -39,11 +53,15 @@ class Retriever:
         logger.info(f"🔍 Querying for: {query_text}")
 
         query_embedding = self.get_embedding(query_text)
-        if not query_embedding:
+        if query_embedding is None:
             logger.error("❌ Failed to generate embedding for query.")
             return [], []
 
-        results = self.collection.query(query_embeddings=[query_embedding], n_results=top_k)
+        try:
+            results = self.collection.query(query_embeddings=[query_embedding], n_results=top_k)
+        except Exception as e:
+            logger.error(f"❌ Error querying ChromaDB: {e}")
+            return [], []
         
         retrieved_chunks = []
         retrieved_sources = []
@@ -54,9 +72,66 @@ class Retriever:
                 retrieved_sources.append(metadata.get("source", "Unknown Source"))
 
         logger.info(f"✅ Retrieved {len(retrieved_chunks)} relevant chunks.")
-        logger.info(f"retrieved_chunks : {retrieved_chunks}")
+        logger.debug("retrieved_chunks : %s", retrieved_chunks)
         return retrieved_chunks, retrieved_sources
 
+    async def query_async(self, query_text, top_k=5):
+        """Runs query() in a worker thread so retrieval can overlap with generation on the event loop."""
+        return await asyncio.to_thread(self.query, query_text, top_k)
+
+    def query_batch(self, query_texts, top_k=5, with_embeddings=False):
+        """
+        Retrieves relevant chunks for many queries with one encode call and one ChromaDB query.
+        Returns a list of (retrieved_chunks, retrieved_sources) tuples, one per query.
+        With with_embeddings, each tuple also carries the chunks' stored embeddings as a float32 matrix
+        (L2-normalized BGE vectors of the chunk text), so callers can score chunks without re-encoding them.
+        """
+        if not query_texts:
+            return []
+
+        logger.info(f"🔍 Batch querying for {len(query_texts)} queries")
+
+        empty = ([], [], np.empty((0, 0), dtype=np.float32)) if with_embeddings else ([], [])
+        try:
+            query_embeddings = encode_normalized(self.embedding_model, query_texts, self.embedding_cache)
+        except Exception as e:
+            logger.error(f"❌ Error generating batch embeddings: {e}")
+            return [empty for _ in query_texts]
+
+        try:
+            if with_embeddings:
+                results = self.collection.query(
+                    query_embeddings=query_embeddings, n_results=top_k, include=["metadatas", "embeddings"]
+                )
+            else:
+                results = self.collection.query(query_embeddings=query_embeddings, n_results=top_k)
+        except Exception as e:
+            logger.error(f"❌ Error querying ChromaDB for the batch: {e}")
+            return [empty for _ in query_texts]
+
+        batch_results = []
+        metadatas = results.get("metadatas") if results else None
+        embeddings = results.get("embeddings") if results and with_embeddings else None
+        for idx in range(len(query_texts)):
+            retrieved_chunks = []
+            retrieved_sources = []
+            if metadatas and idx < len(metadatas):
+                for metadata in metadatas[idx]:
+                    retrieved_chunks.append(metadata["text"])
+                    retrieved_sources.append(metadata.get("source", "Unknown Source"))
+            if with_embeddings:
+                chunk_embeddings = (
+                    np.asarray(embeddings[idx], dtype=np.float32)
+                    if embeddings is not None and idx < len(embeddings) and retrieved_chunks
+                    else np.empty((0, 0), dtype=np.float32)
+                )
+                batch_results.append((retrieved_chunks, retrieved_sources, chunk_embeddings))
+            else:
+                batch_results.append((retrieved_chunks, retrieved_sources))
+
+        logger.info(f"✅ Retrieved chunks for {len(batch_results)} queries.")
+        return batch_results
+
 
 # Test run (optional)
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 import logging
-from pipeline.pipeline import RAGPipeline
+from src.pipeline.pipeline import RAGPipeline
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -1,6 +1,10 @@
 import os
-import json
+import orjson
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from src.text_cleaning import clean_wiki_text
+
 
 class Preprocessor:
     def __init__(self, input_folder="data/raw", output_folder="data/processed"):
@@ -9,49 +13,73 @@ class Preprocessor:
         os.makedirs(self.output_folder, exist_ok=True)
         # Define unwanted table titles/sections
         self.irrelevant_table_keywords = {"history", "navigation"}
+        self.unwanted_headings = frozenset({"Gallery", "References", "Issues", "Achievements", "Sounds", "Advancements",
+                                            "Contents", "Navigation", "History", "See Also"})
+        # Headings are dropped if they contain any unwanted word (case-insensitive); one compiled search per heading
+        self.unwanted_heading_re = re.compile(
+            "|".join(re.escape(heading) for heading in sorted(self.unwanted_headings)), re.IGNORECASE
+        )
+        # Same treatment for table titles/sections: one search instead of lowercasing and testing each keyword
+        self.irrelevant_table_re = re.compile(
+            "|".join(re.escape(keyword) for keyword in sorted(self.irrelevant_table_keywords)), re.IGNORECASE
+        )
 
     def load_json(self, filename):
         try:
-            with open(os.path.join(self.input_folder, filename), "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(os.path.join(self.input_folder, filename), "rb") as f:
+                return orjson.loads(f.read())
         except Exception as e:
             print(f"❌ Error loading {filename}: {e}")
             return {}
 
     def save_json(self, filename, data):
         try:
-            with open(os.path.join(self.output_folder, filename), "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            with open(os.path.join(self.output_folder, filename), "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
             print(f"✅ Processed: {filename}")
         except IOError as e:
             print(f"❌ Error saving {filename}: {e}")
 
+    def save_json_stream(self, filename, chunks):
+        """
+        Writes chunks as a JSON array, one element per line, as the generator produces them,
+        so a page's chunks are never held in memory all at once.
+        The file is written under a temporary name and renamed when complete.
+        """
+        output_path = os.path.join(self.output_folder, filename)
+        tmp_path = output_path + ".part"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(b"[")
+                separator = b"\n"
+                for chunk in chunks:
+                    f.write(separator)
+                    f.write(orjson.dumps(chunk))
+                    separator = b",\n"
+                f.write(b"\n]")
+            os.replace(tmp_path, output_path)
+            print(f"✅ Processed: {filename}")
+        except IOError as e:
+            print(f"❌ Error saving {filename}: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def clean_text(self, text):
         if not text:
             return ""
-        patterns = [
-            r"\[edit\s*\|\s*edit source\]",
-            r"\[hide\]",
-            r"Jump up to:.*",
-            r"See also:.*",
-            r"\[.*?\]",
-            r"↑",
-            r"\s+"
-        ]
-        for pattern in patterns[:-1]:
-            text = re.sub(pattern, "", text, flags=re.IGNORECASE)
-        text = re.sub(patterns[-1], " ", text).strip()
-        return text
+        return clean_wiki_text(text)
+
+    def is_unwanted_heading(self, heading):
+        return self.unwanted_heading_re.search(heading) is not None
 
     def filter_sections(self, sections):
-        unwanted_headings = {"Gallery", "References", "Issues", "Achievements", "Sounds", "Advancements",
-                             "Contents", "Navigation", "History", "See Also"}
         cleaned_sections = []
 
         for section in sections:
             # Use "heading" if available; if not, check for "subheading"
             heading = self.clean_text(section.get("heading", section.get("subheading", "")))
-            if not heading or any(uw.lower() in heading.lower() for uw in unwanted_headings):
+            if not heading or self.is_unwanted_heading(heading):
                 continue
 
             section_text = self.clean_text(section.get("text", ""))
@@ -74,30 +102,92 @@ class Preprocessor:
 
         return cleaned_sections
 
+    def iter_section_units(self, sections, parent_heading=""):
+        """
+        Walks the nested sections depth-first and yields (full_heading, text)
+        for every section or subsection that has non-empty text.
+        Uses an explicit stack, so deeply nested pages cannot hit the recursion limit.
+        """
+        stack = deque((section, parent_heading) for section in reversed(sections))
+        while stack:
+            section, parent = stack.pop()
+            current_heading = section.get("heading") or section.get("subheading", "")
+            full_heading = (f"{parent} - {current_heading}"
+                            if parent and current_heading
+                            else current_heading or parent)
+
+            section_text = section.get("text", "")
+            if section_text.strip():
+                yield full_heading, section_text
+
+            # Pushed in reverse so subsections come off the stack in document order
+            subs = section.get("subsections", [])
+            stack.extend((sub, full_heading) for sub in reversed(subs))
+
     def flatten_sections(self, sections, parent_heading=""):
         """
         Flattens the nested sections into a list of dicts,
         each with { 'title': ..., 'content': ..., 'is_table': False }.
         """
-        flattened = []
+        return [
+            {
+                "title": full_heading,
+                "content": section_text,
+                "is_table": False
+            }
+            for full_heading, section_text in self.iter_section_units(sections, parent_heading)
+        ]
+
+    def iter_section_chunks(self, sections, source):
+        """
+        Filters, cleans and flattens the page sections in a single traversal.
+        Yields the same dicts as flatten_sections(filter_sections(sections)),
+        each already stamped with its source.
+        """
         for section in sections:
-            current_heading = section.get("heading") or section.get("subheading", "")
-            full_heading = (f"{parent_heading} - {current_heading}"
-                            if parent_heading and current_heading
-                            else current_heading or parent_heading)
+            # Use "heading" if available; if not, check for "subheading"
+            heading = self.clean_text(section.get("heading", section.get("subheading", "")))
+            if not heading or self.is_unwanted_heading(heading):
+                continue
 
-            section_text = section.get("text", "")
+            section_text = self.clean_text(section.get("text", ""))
             if section_text.strip():
-                flattened.append({
-                    "title": full_heading,
+                yield {
+                    "title": heading,
                     "content": section_text,
-                    "is_table": False
-                })
+                    "is_table": False,
+                    "source": source
+                }
 
-            subs = section.get("subsections", [])
-            if subs:
-                flattened.extend(self.flatten_sections(subs, full_heading))
-        return flattened
+            for sub in section.get("subsections", []):
+                sub_heading = self.clean_text(sub.get("subheading", ""))
+                sub_text = self.clean_text(sub.get("text", ""))
+                if not (sub_heading or sub_text):
+                    continue
+                # Only the first level of subsections is cleaned; deeper levels are flattened as scraped
+                cleaned_sub = {"subheading": sub_heading, "text": sub_text, "subsections": sub.get("subsections", [])}
+                for full_heading, text in self.iter_section_units([cleaned_sub], heading):
+                    yield {
+                        "title": full_heading,
+                        "content": text,
+                        "is_table": False,
+                        "source": source
+                    }
+
+    def row_key_values(self, row, key_prefixes):
+        """
+        Returns "key: value" strings for the non-empty cells of a row.
+        Each distinct key is cleaned once per table (cached in key_prefixes) and each value once.
+        """
+        row_values = []
+        for key, value in row.items():
+            value = self.clean_text(value)
+            if value:
+                prefix = key_prefixes.get(key)
+                if prefix is None:
+                    prefix = key_prefixes[key] = f"{self.clean_text(key)}: "
+                row_values.append(prefix + value)
+        return row_values
 
     def clean_table(self, table, page_title=""):
         """
@@ -110,31 +200,28 @@ class Preprocessor:
             table_title = section if section else f"{page_title.capitalize()} Table"
 
         # Filter out irrelevant tables based on keywords (e.g., History, Navigation)
-        if any(kw in table_title.lower() for kw in self.irrelevant_table_keywords) or \
-           any(kw in section.lower() for kw in self.irrelevant_table_keywords):
+        if self.irrelevant_table_re.search(table_title) or self.irrelevant_table_re.search(section):
             return []
 
         headers = [self.clean_text(h) for h in table.get("headers", []) if h.strip()]
+        # Build each "header: " prefix once per table instead of once per cell
+        header_prefixes = [(header, f"{header}: ") for header in headers]
         rows = table.get("rows", [])
+        # Raw row key -> "cleaned key: ", shared by every row of the table
+        key_prefixes = {}
         flattened_rows = []
 
         for row in rows:
             if headers:
                 row_values = []
-                for header in headers:
+                for header, prefix in header_prefixes:
                     value = self.clean_text(row.get(header, ""))
                     if value:
-                        row_values.append(f"{header}: {value}")
+                        row_values.append(prefix + value)
                 if not row_values:
-                    row_values = [
-                        f"{self.clean_text(k)}: {self.clean_text(v)}"
-                        for k, v in row.items() if self.clean_text(v)
-                    ]
+                    row_values = self.row_key_values(row, key_prefixes)
             else:
-                row_values = [
-                    f"{self.clean_text(k)}: {self.clean_text(v)}"
-                    for k, v in row.items() if self.clean_text(v)
-                ]
+                row_values = self.row_key_values(row, key_prefixes)
 
             if row_values:
                 row_content = "; ".join(row_values)
@@ -175,33 +262,38 @@ class Preprocessor:
         page_title = self.clean_text(data.get("title", ""))
         source_url = self.clean_text(data.get("url", ""))
 
-        flattened_data = []
+        source = source_url if source_url else page_title
 
-        # Flatten normal text sections
+        self.save_json_stream(filename, self.iter_chunks(data, page_title, source))
+
+    def iter_chunks(self, data, page_title, source):
+        """
+        Yields every chunk of a page in output order: text sections, table rows,
+        then the crafting recipe, each stamped with its source.
+        """
+        # Filter, clean and flatten normal text sections in one pass
         if "sections" in data:
-            cleaned_sections = self.filter_sections(data["sections"])
-            flattened_data.extend(self.flatten_sections(cleaned_sections))
+            yield from self.iter_section_chunks(data["sections"], source)
 
         # Flatten table data
         if "tables" in data and isinstance(data["tables"], list):
             for table in data["tables"]:
-                flattened_data.extend(self.clean_table(table, page_title))
+                for row_chunk in self.clean_table(table, page_title):
+                    row_chunk["source"] = source
+                    yield row_chunk
 
         # Process crafting_recipe as a separate chunk if present
         if "crafting_recipe" in data and data["crafting_recipe"]:
             recipe_chunk = self.simplify_crafting_recipe(data["crafting_recipe"])
-            flattened_data.append(recipe_chunk)
-
-        # Add source info to each chunk
-        for chunk in flattened_data:
-            chunk["source"] = source_url if source_url else page_title
-
-        self.save_json(filename, flattened_data)
+            recipe_chunk["source"] = source
+            yield recipe_chunk
 
-    def run(self):
-        files = [f for f in os.listdir(self.input_folder) if f.endswith(".json")]
-        for file in files:
-            self.preprocess_file(file)
+    def run(self, max_workers=None):
+        with os.scandir(self.input_folder) as entries:
+            files = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".json")]
+        # Cleaning is regex work with no state shared between pages, so each page goes to a worker process
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self.preprocess_file, files, chunksize=4))
 
 if __name__ == "__main__":
     preprocessor = Preprocessor()
@@ -1,17 +1,142 @@
 import os
-import json
+import re
+import atexit
+import gzip
+import orjson
 import time
 import logging
+import asyncio
+import threading
+import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timezone
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from src.browser import create_chrome_driver
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Shared HTTP session so page fetches reuse pooled connections to the wiki
+_session = requests.Session()
+_session.headers.update({"User-Agent": "Rag-ChatBot wiki scraper (python-requests)"})
+_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+# ETag / Last-Modified of every page already saved, so reruns can send conditional GETs.
+# Kept outside data/raw so the preprocessor does not pick it up as a page.
+HTTP_CACHE_PATH = "data/http_cache.json"
+_http_cache = None
+_http_cache_dirty = False
+_http_cache_lock = threading.Lock()
+
+
+def _load_http_cache():
+    """Loads the validator index once per process. Caller holds _http_cache_lock."""
+    global _http_cache
+    if _http_cache is None:
+        try:
+            with open(HTTP_CACHE_PATH, "rb") as f:
+                _http_cache = orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            _http_cache = {}
+    return _http_cache
+
+
+def get_validators(url):
+    """Returns the stored {"etag", "last_modified"} for url, or an empty dict."""
+    with _http_cache_lock:
+        return dict(_load_http_cache().get(url, {}))
+
+
+def store_validators(url, validators):
+    """Records the validators of a saved page in memory; flush_validators() writes the index."""
+    global _http_cache_dirty
+    with _http_cache_lock:
+        _load_http_cache()[url] = validators
+        _http_cache_dirty = True
+
+
+@atexit.register
+def flush_validators():
+    """Rewrites the validator index atomically if validators were stored since the last write."""
+    global _http_cache_dirty
+    with _http_cache_lock:
+        if not _http_cache_dirty:
+            return
+        os.makedirs(os.path.dirname(HTTP_CACHE_PATH) or ".", exist_ok=True)
+        tmp_path = HTTP_CACHE_PATH + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(_http_cache, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, HTTP_CACHE_PATH)
+        _http_cache_dirty = False
+
+
+# Everything the scraper reads lives in the article body, so only that subtree is built;
+# navigation, sidebars and footers are tokenized but never turned into Tag objects.
+# While parsing, the strainer sees the raw class string ("mw-content-ltr mw-parser-output"), hence the regex.
+CONTENT_ONLY = SoupStrainer("div", {"class": re.compile(r"(?:^|\s)mw-parser-output(?:\s|$)")})
+
+# Text of MediaWiki's section edit links, stripped from headings
+EDIT_LINK = "[edit | edit source]"
+
+# Serializes only the outermost mw-parser-output elements in the browser (what CONTENT_ONLY keeps),
+# instead of transferring and re-parsing the whole page_source
+CONTENT_HTML_JS = (
+    "return Array.from(document.querySelectorAll('.mw-parser-output'))"
+    ".filter(e => !e.parentElement || !e.parentElement.closest('.mw-parser-output'))"
+    ".map(e => e.outerHTML).join('');"
+)
+
+
+def wait_for_content(driver, timeout=10):
+    """
+    Waits until the article body (mw-parser-output) is present instead of sleeping a fixed time.
+    On timeout the page is used as-is; parsing then reports the missing content.
+    """
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "mw-parser-output"))
+        )
+    except TimeoutException:
+        logging.warning(f"⚠️ Timed out waiting for page content: {driver.current_url}")
+
+
+class ScraperSession:
+    """
+    Holds one headless Chrome driver shared by several scrapers, so Chrome starts once per batch
+    instead of once per topic:
+
+        with ScraperSession() as session:
+            for topic in topics:
+                MinecraftWikiScraper(topic, js_required=True, session=session).run()
+
+    A driver handles one page at a time, so a session must not be shared across threads.
+    """
+
+    def __enter__(self):
+        self.driver = create_chrome_driver()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.driver.quit()
+        return False
+
+
+def cell_text(tag):
+    """
+    Same result as tag.get_text(strip=True). Most table cells hold a single string
+    (possibly wrapped in one link), which .string returns without walking the descendants.
+    """
+    text = tag.string
+    # Exact type check: comments, CDATA and script strings take the general path like before
+    if type(text) is NavigableString:
+        return text.strip()
+    return tag.get_text(strip=True)
+
+
 class MinecraftWikiScraper:
     BASE_URL = "https://minecraft.wiki/w/"
 
@@ -26,53 +151,107 @@ class MinecraftWikiScraper:
         "Items"
     }
 
-    def __init__(self, topic, max_retries=3):
+    def __init__(self, topic, max_retries=3, js_required=False, session=None, save_snapshot=False, max_age=None):
         """
         Initializes the scraper for a given topic.
+        Pages are fetched over plain HTTP; set js_required=True to render them in headless Chrome instead.
+        Pass a ScraperSession to reuse its Chrome driver rather than starting one for this page.
+        With save_snapshot=True the raw HTML is kept next to the JSON as <topic>.html.gz.
+        With max_age (seconds), a topic whose JSON was saved more recently is not fetched at all.
         """
         self.topic = topic.replace(" ", "_")  # Convert spaces to underscores
         self.url = f"{self.BASE_URL}{self.topic}"
+        # Decided once from the normalized topic, so "Potion Brewing" and "Potion_Brewing" behave alike
+        self.scrape_tables = self.topic in self.TABLE_SCRAPING_PAGES
         # Initialize data without crafting_recipe key by default.
         self.data = {
             "source": "Minecraft Wiki",
             "url": self.url,
             "title": topic,
             "sections": [],
-            "tables": [] if topic in self.TABLE_SCRAPING_PAGES else None,
+            "tables": [] if self.scrape_tables else None,
             "last_updated": str(datetime.now(timezone.utc))
         }
         self.max_retries = max_retries
+        self.js_required = js_required
+        self.session = session
+        self.save_snapshot = save_snapshot
+        self.max_age = max_age
+        self.validators = {}  # ETag / Last-Modified of the fetched page
 
-    def fetch_page_with_selenium(self):
+    def fetch_page(self, folder="data/raw"):
         """
-        Fetches the page using Selenium (Headless Chrome) and returns both the BeautifulSoup object and the raw HTML snapshot.
+        Fetches the page and returns both the BeautifulSoup object and the raw HTML snapshot.
+        The wiki serves sections and tables as static HTML, so a plain GET is enough unless js_required is set;
+        a page whose HTML has no article body is rendered with Selenium instead.
+        If the page was saved before, the GET is conditional; (None, None) means it is unchanged (304).
+        Retries up to max_retries times with exponential backoff.
         """
-        options = Options()
-        options.add_argument("--headless")  # Run in headless mode (no GUI)
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
+        if self.js_required:
+            return self.fetch_page_with_selenium()
 
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        headers = {}
+        if os.path.exists(f"{folder}/{self.topic}.json"):
+            stored = get_validators(self.url)
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
 
-        logging.info(f"🚀 Fetching: {self.url} using Selenium...")
-        driver.get(self.url)
-        time.sleep(5)  # Allow page to fully load
-        page_source = driver.page_source
-        driver.quit()
+        delay = 1
+        for attempt in range(self.max_retries):
+            try:
+                logging.info(f"🚀 Fetching: {self.url}")
+                response = _session.get(self.url, headers=headers, timeout=30)
+                if response.status_code == 304:
+                    return None, None
+                response.raise_for_status()
+                self.validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                page_source = response.text
+                soup = BeautifulSoup(page_source, "html.parser", parse_only=CONTENT_ONLY)
+                if soup.find("div", {"class": "mw-parser-output"}) is None:
+                    logging.warning(f"⚠️ No article body in the HTML of {self.url}, rendering it with Selenium")
+                    return self.fetch_page_with_selenium()
+                logging.info("✅ Successfully fetched page.")
+                return soup, page_source
+            except requests.RequestException as e:
+                logging.warning(f"⚠️ Attempt {attempt + 1} to fetch {self.url} failed: {e}")
+                if attempt == self.max_retries - 1:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def fetch_page_with_selenium(self):
+        """
+        Fetches the page using Selenium (Headless Chrome) and returns the BeautifulSoup object and the HTML it was
+        parsed from: the full page when save_snapshot is set, otherwise just the article body.
+        Uses the ScraperSession's driver when one was given; otherwise starts and quits a driver for this page.
+        """
+        driver = self.session.driver if self.session else create_chrome_driver()
+        try:
+            logging.info(f"🚀 Fetching: {self.url} using Selenium...")
+            driver.get(self.url)
+            wait_for_content(driver)
+            # The full page is only needed when it is kept as a snapshot
+            page_source = driver.page_source if self.save_snapshot else driver.execute_script(CONTENT_HTML_JS)
+        finally:
+            if not self.session:
+                driver.quit()
 
         logging.info("✅ Successfully fetched page with Selenium.")
-        return BeautifulSoup(page_source, "html.parser"), page_source
+        return BeautifulSoup(page_source, "html.parser", parse_only=CONTENT_ONLY), page_source
 
-    def parse_crafting_grid(self, grid_html):
+    def parse_crafting_grid(self, grid_cell):
         """
-        Parses the raw grid HTML for a crafting recipe.
+        Parses the grid of a crafting recipe, given as its Tag (or as raw HTML, which is parsed first).
         This implementation first attempts to use the "data-minetip-title" attribute,
         and if that is not available, it falls back to the <a> tag's "title" attribute.
         Returns a list of rows, where each row is a list of ingredient names.
         """
-        grid_soup = BeautifulSoup(grid_html, "html.parser")
+        grid_soup = BeautifulSoup(grid_cell, "html.parser") if isinstance(grid_cell, str) else grid_cell
         grid = []
         # Find all rows using the 'mcui-row' class.
         rows = grid_soup.find_all("span", class_="mcui-row")
@@ -115,22 +294,33 @@ class MinecraftWikiScraper:
                         cells = rows[1].find_all("td")
                         if len(cells) >= 2:
                             ingredients = cells[0].get_text(separator=" ").strip()
-                            grid_html = str(cells[1])
-                            grid_cleaned = self.parse_crafting_grid(grid_html)
+                            # Read the grid from the tree already in memory instead of re-parsing its HTML
+                            grid_cleaned = self.parse_crafting_grid(cells[1])
                             logging.info("🔍 Crafting recipe found and extracted.")
+                            # The grid's raw HTML is not saved; grid_cleaned carries everything the preprocessor uses
                             return {
                                 "ingredients": ingredients,
-                                "grid_raw": grid_html,
                                 "grid_cleaned": grid_cleaned
                             }
         logging.info("ℹ️ No crafting recipe table found on this page.")
         return None
 
+    def parse_page(self, soup):
+        """
+        Extracts sections and, for TABLE_SCRAPING_PAGES, tables into self.data
+        in a single walk over the page content (same result as parse_sections() + extract_tables()).
+        """
+        content = soup.find("div", {"class": "mw-parser-output"})
+        if not content:
+            logging.warning(f"⚠️ No content found for {self.topic}")
+            return
+        self.walk_content(content, with_sections=True, with_tables=self.scrape_tables)
+
     def extract_tables(self, soup):
         """
         Extracts tables from the page ONLY for specific pages.
         """
-        if self.topic not in self.TABLE_SCRAPING_PAGES:
+        if not self.scrape_tables:
             return  # Skip table extraction for other pages
 
         content = soup.find("div", {"class": "mw-parser-output"})
@@ -138,36 +328,7 @@ class MinecraftWikiScraper:
             logging.warning(f"⚠️ No content found for {self.topic}")
             return
 
-        tables = content.find_all("table", {"class": "wikitable"})
-        current_section = None  # To track which section the table belongs to
-
-        for element in content.find_all(["h2", "h3", "table"]):
-            if element.name in ["h2", "h3"]:
-                heading_text = element.get_text(strip=True).replace("[edit | edit source]", "")
-                current_section = heading_text
-
-            if element.name == "table":
-                # Get table title from <caption>, else use the closest section heading.
-                table_title = element.find("caption")
-                if table_title:
-                    table_title = table_title.get_text(strip=True)
-                else:
-                    table_title = current_section or "Unknown Table"
-
-                headers = [th.get_text(strip=True) for th in element.find_all("th")]
-                rows = []
-                tr_list = element.find_all("tr")
-                for row in tr_list[1:]:
-                    columns = [td.get_text(strip=True) for td in row.find_all("td")]
-                    if columns:
-                        rows.append(dict(zip(headers, columns)))
-                if headers and rows:
-                    self.data["tables"].append({
-                        "title": table_title,
-                        "headers": headers,
-                        "rows": rows
-                    })
-                    logging.info(f"📋 Extracted table: {table_title} (Rows: {len(rows)})")
+        self.walk_content(content, with_sections=False, with_tables=True)
 
     def parse_sections(self, soup):
         """
@@ -180,8 +341,12 @@ class MinecraftWikiScraper:
             logging.warning(f"⚠️ No content found for {self.topic}")
             return
 
-        # 1) Extract the introduction paragraph.
-        intro_paragraph = ""
+        self.walk_content(content, with_sections=True, with_tables=False)
+
+    def extract_intro(self, content):
+        """
+        Returns the first paragraph after hatnotes/figures and removes it from the content.
+        """
         for child in content.children:
             if not child.name:
                 continue
@@ -192,45 +357,110 @@ class MinecraftWikiScraper:
             if child.name == "p":
                 intro_paragraph = child.get_text(separator=" ").strip()
                 child.decompose()
-                break
+                return intro_paragraph
+        return ""
 
-        if intro_paragraph:
-            self.data["sections"].append({
-                "heading": "Introduction",
-                "text": intro_paragraph,
-                "subsections": []
-            })
+    def walk_content(self, content, with_sections=True, with_tables=False):
+        """
+        Walks the page content once, appending sections and/or tables to self.data.
+        """
+        # 1) Extract the introduction paragraph.
+        if with_sections:
+            intro_paragraph = self.extract_intro(content)
+            if intro_paragraph:
+                self.data["sections"].append({
+                    "heading": "Introduction",
+                    "text": intro_paragraph,
+                    "subsections": []
+                })
 
-        # 2) Parse remaining sections.
+        tags = ["h2", "h3"]
+        if with_sections:
+            tags += ["p", "ul", "ol"]
+        if with_tables:
+            tags.append("table")
+
+        # 2) Parse remaining sections and tables in document order.
         current_section = None
-        for element in content.find_all(["h2", "h3", "p", "ul", "ol"]):
-            if element.name == "h2":
-                if current_section:
-                    self.data["sections"].append(current_section)
-                heading_text = element.get_text(strip=True).replace("[edit | edit source]", "")
-                current_section = {
-                    "heading": heading_text,
-                    "text": "",
-                    "subsections": []
-                }
-            elif element.name == "h3":
-                if current_section:
-                    subheading_text = element.get_text(strip=True).replace("[edit | edit source]", "")
-                    current_section["subsections"].append({
-                        "subheading": subheading_text,
+        current_heading = None  # Closest h2/h3, used to title tables without a <caption>
+        # Paragraphs of the open section/subsection are collected and joined once it closes,
+        # instead of growing its "text" string with += per element
+        text_target = None
+        text_parts = []
+        for element in content.find_all(tags):
+            if element.name in ("h2", "h3"):
+                heading_text = element.get_text(strip=True).replace(EDIT_LINK, "")
+                current_heading = heading_text
+                if not with_sections:
+                    continue
+                if element.name == "h2":
+                    if current_section:
+                        text_target["text"] = "".join(text_parts)
+                        self.data["sections"].append(current_section)
+                    current_section = {
+                        "heading": heading_text,
+                        "text": "",
+                        "subsections": []
+                    }
+                    text_target, text_parts = current_section, []
+                elif current_section:
+                    text_target["text"] = "".join(text_parts)
+                    subsection = {
+                        "subheading": heading_text,
                         "text": ""
-                    })
-            elif element.name in ["p", "ul", "ol"]:
-                text_content = element.get_text(separator=" ").strip() + " "
-                if current_section:
-                    if current_section["subsections"]:
-                        current_section["subsections"][-1]["text"] += text_content
-                    else:
-                        current_section["text"] += text_content
+                    }
+                    current_section["subsections"].append(subsection)
+                    text_target, text_parts = subsection, []
+            elif element.name == "table":
+                table = self.parse_table(element, current_heading)
+                if table:
+                    self.data["tables"].append(table)
+            elif current_section:
+                text_parts.append(element.get_text(separator=" ").strip() + " ")
 
         if current_section:
+            text_target["text"] = "".join(text_parts)
             self.data["sections"].append(current_section)
 
+    def parse_table(self, element, current_heading):
+        """
+        Converts a <table> into {title, headers, rows}, or None if it has no header or data rows.
+        """
+        # Get table title from <caption>, else use the closest section heading.
+        table_title = element.find("caption")
+        if table_title:
+            table_title = cell_text(table_title)
+        else:
+            table_title = current_heading or "Unknown Table"
+
+        tr_list = element.find_all("tr")
+        # Column names come from the first row, the one skipped as data below;
+        # row-header <th> cells further down the table are not column names
+        headers = [cell_text(th) for th in tr_list[0].find_all("th")] if tr_list else []
+        rows = []
+        for row in tr_list[1:]:
+            columns = [cell_text(td) for td in row.find_all("td")]
+            if columns:
+                rows.append(dict(zip(headers, columns)))
+        if headers and rows:
+            logging.info(f"📋 Extracted table: {table_title} (Rows: {len(rows)})")
+            return {
+                "title": table_title,
+                "headers": headers,
+                "rows": rows
+            }
+        return None
+
+    def save_snapshot_gz(self, snapshot, folder="data/raw"):
+        """
+        Saves the raw HTML snapshot as a gzip file beside the JSON output.
+        """
+        os.makedirs(folder, exist_ok=True)
+        filename = f"{folder}/{self.topic}.html.gz"
+        with gzip.open(filename, "wb") as f:
+            f.write(snapshot.encode("utf-8"))
+        logging.info(f"🗜️ HTML snapshot saved to {filename}")
+
     def save_to_json(self, folder="data/raw"):
         """
         Saves the extracted data to a JSON file.
@@ -240,32 +470,83 @@ class MinecraftWikiScraper:
         if self.data.get("crafting_recipe") is None:
             self.data.pop("crafting_recipe", None)
         filename = f"{folder}/{self.topic}.json"
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        # Write to a temp file and swap it in, so a crash never leaves a half-written JSON behind
+        tmp_path = f"{filename}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(self.data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, filename)
         table_count = len(self.data["tables"]) if self.data["tables"] else 0
         logging.info(f"✅ Data saved to {filename} (Sections: {len(self.data['sections'])}, Tables: {table_count}, Crafting Recipe: {'Yes' if 'crafting_recipe' in self.data else 'No'})")
 
+    def is_fresh(self, folder="data/raw"):
+        """True if max_age is set and the topic's JSON was saved less than max_age seconds ago."""
+        if self.max_age is None:
+            return False
+        try:
+            return time.time() - os.path.getmtime(f"{folder}/{self.topic}.json") < self.max_age
+        except OSError:
+            return False
+
     def run(self):
         """
         Runs the complete scraping pipeline.
         """
+        if self.is_fresh():
+            logging.info(f"⏩ Skipping {self.topic}, scraped within the last {self.max_age} s")
+            return
         logging.info(f"🔍 Scraping: {self.url}")
-        soup, snapshot = self.fetch_page_with_selenium()
-        # Optionally, you can store the raw HTML snapshot:
-        self.data["html_snapshot"] = snapshot
-        self.parse_sections(soup)
-        self.extract_tables(soup)
+        soup, snapshot = self.fetch_page()
+        if soup is None:
+            logging.info(f"⏭️  {self.topic} is unchanged since the last scrape")
+            return
+        # The raw HTML is not part of the JSON; it is only kept (compressed) when requested
+        if self.save_snapshot:
+            self.save_snapshot_gz(snapshot)
+        self.parse_page(soup)
         # Attempt to extract a crafting recipe. Only add the key if found.
         recipe = self.extract_crafting_recipe(soup)
         if recipe:
             self.data["crafting_recipe"] = recipe
         self.save_to_json()
+        # Only remember validators once the JSON they describe is on disk
+        if any(self.validators.values()):
+            store_validators(self.url, self.validators)
+
+async def scrape_topics_async(topics, max_concurrency=8, **scraper_kwargs):
+    """
+    Scrapes many topics concurrently: up to max_concurrency scrapers run at once in worker threads,
+    sharing the pooled HTTP session, so network waits overlap instead of adding up.
+    Returns the topics that failed.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def scrape(topic):
+        async with semaphore:
+            try:
+                await asyncio.to_thread(MinecraftWikiScraper(topic, **scraper_kwargs).run)
+            except Exception as e:
+                logging.error(f"❌ Error scraping {topic}: {e}")
+                return topic
+            return None
+
+    try:
+        results = await asyncio.gather(*(scrape(topic) for topic in topics))
+    finally:
+        # One index write for the whole batch instead of one per saved page
+        flush_validators()
+    return [topic for topic in results if topic]
+
+
+def scrape_topics(topics, max_concurrency=8, **scraper_kwargs):
+    """Synchronous wrapper around scrape_topics_async."""
+    return asyncio.run(scrape_topics_async(topics, max_concurrency, **scraper_kwargs))
+
 
 # Example usage:
 if __name__ == "__main__":
     topics = [
        "Wooden_Axe"
     ]
-    for topic in topics:
-        scraper = MinecraftWikiScraper(topic)
-        scraper.run()
+    failed = scrape_topics(topics)
+    if failed:
+        logging.warning(f"⚠️ Failed topics: {failed}")
@@ -1,8 +1,9 @@
 import os
-import json
-import uuid
+import hashlib
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from src.text_splitter import split_text
 import logging
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -14,25 +15,21 @@ class Chunker:
         output_dir="data/chunks",
         chunk_size=400,
         chunk_overlap=80,
+        pretty=False,
     ):
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        # Indented output is for inspecting chunks by hand; compact JSON is smaller and faster to write
+        self.pretty = pretty
 
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # This splitter is used for sections that exceed chunk_size (if is_table=False).
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            separators=["\n\n", "\n", ". ", " "]
-        )
-
     def load_json(self, filepath):
         try:
-            with open(filepath, "r", encoding="utf-8") as file:
-                return json.load(file)
+            with open(filepath, "rb") as file:
+                return orjson.loads(file.read())
         except Exception as e:
             logging.error(f"❌ Error loading {filepath}: {e}")
             return None
@@ -40,8 +37,8 @@ class Chunker:
     def save_chunks(self, filename, chunks):
         output_path = os.path.join(self.output_dir, filename)
         try:
-            with open(output_path, "w", encoding="utf-8") as file:
-                json.dump(chunks, file, ensure_ascii=False, indent=4)
+            with open(output_path, "wb") as file:
+                file.write(orjson.dumps(chunks, option=orjson.OPT_INDENT_2 if self.pretty else 0))
             logging.info(f"✅ Chunks saved to {output_path}")
         except Exception as e:
             logging.error(f"❌ Error saving chunks for {filename}: {e}")
@@ -49,7 +46,7 @@ class Chunker:
     def chunk_document(self, document, page_title=""):
         chunks = []
 
-        for section in document:
+        for section_idx, section in enumerate(document):
             content = section.get("content", "")
             title = section.get("title", "Untitled")
             source = section.get("source", "Unknown")
@@ -62,39 +59,28 @@ class Chunker:
             else:
                 display_title = title
 
+            # Computed once per section and shared by all of its chunks
+            slug = display_title.replace(' ', '_')
+            prefix = f"{display_title}\n\n"
+
+            # Table rows and short sections become a single chunk; longer sections are split
+            if is_table or len(content) <= self.chunk_size:
+                pieces = [content]
+            else:
+                # Split on paragraph/line/sentence/word boundaries
+                pieces = split_text(content, self.chunk_size, self.chunk_overlap)
+
             # Prepend the title to content for each chunk
-            if is_table:
-                unique_id = uuid.uuid4().hex[:8]
-                chunk_text = f"{display_title}\n\n{content}"
+            for piece_idx, piece in enumerate(pieces):
+                text = prefix + piece
                 chunks.append({
                     "title": display_title,
-                    "chunk_id": f"{display_title.replace(' ', '_')}_{unique_id}",
-                    "text": chunk_text,
+                    # Derived from the position and the text, so re-chunking unchanged pages reproduces the
+                    # same ids (the vector stores skip them) while identical text under repeated headings stays distinct
+                    "chunk_id": f"{slug}_{section_idx}_{piece_idx}_{hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()}",
+                    "text": text,
                     "source": source
                 })
-            else:
-                # Non-table section
-                if len(content) <= self.chunk_size:
-                    unique_id = uuid.uuid4().hex[:8]
-                    chunk_text = f"{display_title}\n\n{content}"
-                    chunks.append({
-                        "title": display_title,
-                        "chunk_id": f"{display_title.replace(' ', '_')}_{unique_id}",
-                        "text": chunk_text,
-                        "source": source
-                    })
-                else:
-                    # Split with RecursiveCharacterTextSplitter
-                    split_texts = self.splitter.split_text(content)
-                    for sub_chunk in split_texts:
-                        unique_id = uuid.uuid4().hex[:8]
-                        chunk_text = f"{display_title}\n\n{sub_chunk}"
-                        chunks.append({
-                            "title": display_title,
-                            "chunk_id": f"{display_title.replace(' ', '_')}_{unique_id}",
-                            "text": chunk_text,
-                            "source": source
-                        })
 
         return chunks
 
@@ -120,10 +106,21 @@ class Chunker:
         chunks = self.chunk_document(document, page_title)
         self.save_chunks(filename, chunks)
 
-    def run(self):
-        files = [f for f in os.listdir(self.input_dir) if f.endswith(".json")]
-        for file in files:
-            self.process_file(file)
+    def run(self, max_workers=None):
+        with os.scandir(self.input_dir) as entries:
+            files = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".json")]
+
+        # One listing of the output folder instead of an exists() check per file in the workers
+        with os.scandir(self.output_dir) as entries:
+            done = {entry.name for entry in entries}
+        pending = [filename for filename in files if filename not in done]
+        if len(pending) < len(files):
+            logging.info(f"⏩ Skipping {len(files) - len(pending)} files, already chunked.")
+        files = pending
+
+        # Only the pending pages reach the pool; splitting text is pure Python, hence processes rather than threads
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self.process_file, files, chunksize=8))
 
 if __name__ == "__main__":
     chunker = Chunker()
@@ -1,35 +1,48 @@
 import os
-import json
+import orjson
 import time
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+import requests
+from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
+from src.browser import create_chrome_driver
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Shared HTTP session so category pages reuse pooled connections to the wiki
+_session = requests.Session()
+_session.headers.update({"User-Agent": "Rag-ChatBot wiki scraper (python-requests)"})
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+# Article links and the previous/next page links all live in the "Pages in category" block
+CATEGORY_PAGES_ONLY = SoupStrainer("div", id="mw-pages")
+
 class CategoryPageCollector:
     BASE_URL = "https://minecraft.wiki/w/Category:"
 
-    def __init__(self, category, output_file="data/pages.json", max_retries=3):
+    def __init__(self, category, output_file="data/pages.json", max_retries=3, js_required=False):
         """
         Initializes the scraper to collect article links from a category page.
 
         Args:
             category (str): The category name to scrape.
             output_file (str): File to store extracted page names.
-            max_retries (int): Max retries for handling pagination issues.
+            max_retries (int): Max attempts per category page over HTTP.
+            js_required (bool): Render category pages in headless Chrome instead of fetching them over HTTP.
         """
         self.category = category.replace(" ", "_")  # Convert spaces to underscores
         self.url = f"{self.BASE_URL}{self.category}"
         self.output_file = output_file
         self.max_retries = max_retries
+        self.js_required = js_required
+        self.driver = None  # Started on first Selenium fetch and reused across pagination
         self.pages_collected = set()  # Use a set to prevent duplicates
 
         # Load existing pages.json (if exists) to avoid re-scraping
@@ -39,8 +52,8 @@ class CategoryPageCollector:
         """Loads existing scraped pages from pages.json to avoid duplicates."""
         if os.path.exists(self.output_file):
             try:
-                with open(self.output_file, "r", encoding="utf-8") as f:
-                    existing_data = json.load(f)
+                with open(self.output_file, "rb") as f:
+                    existing_data = orjson.loads(f.read())
                     for page in existing_data.get("pages", []):
                         self.pages_collected.add(page)
                 logging.info(f"📂 Loaded {len(self.pages_collected)} existing pages from {self.output_file}")
@@ -53,77 +66,102 @@ class CategoryPageCollector:
         os.makedirs(os.path.dirname(self.output_file), exist_ok=True)
 
         try:
-            with open(self.output_file, "w", encoding="utf-8") as f:
-                json.dump(pages_data, f, indent=4, ensure_ascii=False)
+            with open(self.output_file, "wb") as f:
+                f.write(orjson.dumps(pages_data, option=orjson.OPT_INDENT_2))
             logging.info(f"✅ Saved {len(self.pages_collected)} pages to {self.output_file}")
         except IOError as e:
             logging.error(f"❌ Error saving pages.json: {e}")
 
-    def fetch_page_with_selenium(self, url):
-        """Fetches the page using Selenium and returns a BeautifulSoup object."""
-        options = Options()
-        options.add_argument("--headless")  # Run headless
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+    def fetch_page(self, url):
+        """
+        Fetches a category page and returns its "Pages in category" block as BeautifulSoup.
+        Category listings are static HTML, so a plain GET is enough unless js_required is set.
+        Retries up to max_retries times with exponential backoff.
+        """
+        if self.js_required:
+            return self.fetch_page_with_selenium(url)
 
-        logging.info(f"🚀 Fetching: {url} using Selenium...")
-        driver.get(url)
-        time.sleep(3)  # Allow page to fully load
+        delay = 1
+        for attempt in range(self.max_retries):
+            try:
+                logging.info(f"🚀 Fetching: {url}")
+                response = _session.get(url, timeout=30)
+                response.raise_for_status()
+                return BeautifulSoup(response.text, "html.parser", parse_only=CATEGORY_PAGES_ONLY)
+            except requests.RequestException as e:
+                logging.warning(f"⚠️ Attempt {attempt + 1} to fetch {url} failed: {e}")
+                if attempt == self.max_retries - 1:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def init_browser(self):
+        """Starts the headless Chrome driver shared by every category page of this run."""
+        return create_chrome_driver()
 
-        return driver
+    def fetch_page_with_selenium(self, url):
+        """Fetches the page using Selenium and returns its "Pages in category" block as BeautifulSoup."""
+        if self.driver is None:
+            self.driver = self.init_browser()
 
-    def extract_page_links(self, driver):
-        """Extracts article page links from the 'Pages in category' section."""
+        logging.info(f"🚀 Fetching: {url} using Selenium...")
+        self.driver.get(url)
+        # Wait for the category listing instead of sleeping a fixed time
         try:
-            # Locate the section containing article links
-            page_section = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@id='mw-pages']"))
-            )
-
-            # Extract all <a> links inside this section
-            links = page_section.find_elements(By.XPATH, ".//a")
-            for link in links:
-                page_name = link.text.strip()
-                if page_name and "Category:" not in page_name:  # Avoid category links
-                    self.pages_collected.add(page_name)
+            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.ID, "mw-pages")))
+        except TimeoutException:
+            logging.warning(f"⚠️ Timed out waiting for the category listing: {url}")
 
-            logging.info(f"🔗 Found {len(links)} article links on this page.")
+        return BeautifulSoup(self.driver.page_source, "html.parser", parse_only=CATEGORY_PAGES_ONLY)
 
-        except Exception as e:
-            logging.warning(f"⚠️ No valid 'Pages in category' section found: {e}")
-
-    def find_next_page(self, driver):
-        """Finds and returns the 'Next page' link, if available."""
-        try:
-            next_link = driver.find_element(By.LINK_TEXT, "next page")
-            if next_link:
-                return next_link.get_attribute("href")  # Get the URL of the next page
-        except Exception:
-            return None  # No pagination link found
+    def extract_page_links(self, soup):
+        """Extracts article page links from the 'Pages in category' section."""
+        # Locate the section containing article links
+        page_section = soup.find("div", id="mw-pages")
+        if page_section is None:
+            logging.warning("⚠️ No valid 'Pages in category' section found.")
+            return
+
+        # MediaWiki wraps the listing itself in a mw-content-<dir> div, which leaves out the
+        # "previous page"/"next page" controls; fall back to every link if that markup changes
+        links = page_section.select("div.mw-content-ltr a, div.mw-content-rtl a") or page_section.find_all("a")
+        for link in links:
+            page_name = link.get_text().strip()
+            if page_name and "Category:" not in page_name:  # Avoid category links
+                self.pages_collected.add(page_name)
+
+        logging.info(f"🔗 Found {len(links)} article links on this page.")
+
+    def find_next_page(self, soup, current_url):
+        """Finds and returns the absolute URL of the 'Next page' link, if available."""
+        next_link = soup.find("a", string="next page")
+        if next_link and next_link.get("href"):
+            return urljoin(current_url, next_link["href"])
+        return None  # No pagination link found
 
     def run(self):
         """Runs the scraper to collect all pages in the category."""
         current_url = self.url
         retry_count = 0
 
-        while current_url and retry_count < self.max_retries:
-            driver = self.fetch_page_with_selenium(current_url)
-            self.extract_page_links(driver)
-
-            next_url = self.find_next_page(driver)
-            driver.quit()
-
-            if next_url:
-                logging.info(f"➡️ Moving to next page: {next_url}")
-                current_url = next_url
-                time.sleep(2)  # Avoid aggressive requests
-            else:
-                logging.info("✅ No more pagination. Scraping complete.")
-                break  # Stop loop if no next page
+        try:
+            while current_url and retry_count < self.max_retries:
+                soup = self.fetch_page(current_url)
+                self.extract_page_links(soup)
+
+                next_url = self.find_next_page(soup, current_url)
+
+                if next_url:
+                    logging.info(f"➡️ Moving to next page: {next_url}")
+                    current_url = next_url
+                    time.sleep(2)  # Avoid aggressive requests
+                else:
+                    logging.info("✅ No more pagination. Scraping complete.")
+                    break  # Stop loop if no next page
+        finally:
+            if self.driver is not None:
+                self.driver.quit()  # Close the browser once the whole category is walked
+                self.driver = None
 
         self.save_pages()
 
@@ -1,17 +1,56 @@
 import os
-import json
+import re
+import orjson
 import time
 import logging
+import asyncio
+import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timezone
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from src.browser import create_chrome_driver
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Shared HTTP session so page fetches reuse pooled connections to the wiki
+_session = requests.Session()
+_session.headers.update({"User-Agent": "Rag-ChatBot wiki scraper (python-requests)"})
+_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+
+# Everything the scraper reads lives in the article body, so only that subtree is built;
+# navigation, sidebars and footers are tokenized but never turned into Tag objects.
+# While parsing, the strainer sees the raw class string ("mw-content-ltr mw-parser-output"), hence the regex.
+CONTENT_ONLY = SoupStrainer("div", {"class": re.compile(r"(?:^|\s)mw-parser-output(?:\s|$)")})
+
+# Text of MediaWiki's section edit links, stripped from headings
+EDIT_LINK = "[edit | edit source]"
+
+# Serializes only the outermost mw-parser-output elements in the browser (what CONTENT_ONLY keeps),
+# instead of transferring and re-parsing the whole page_source
+CONTENT_HTML_JS = (
+    "return Array.from(document.querySelectorAll('.mw-parser-output'))"
+    ".filter(e => !e.parentElement || !e.parentElement.closest('.mw-parser-output'))"
+    ".map(e => e.outerHTML).join('');"
+)
+
+
+def cell_text(tag):
+    """
+    Same result as tag.get_text(strip=True). Most table cells hold a single string
+    (possibly wrapped in one link), which .string returns without walking the descendants.
+    """
+    text = tag.string
+    # Exact type check: comments, CDATA and script strings take the general path like before
+    if type(text) is NavigableString:
+        return text.strip()
+    return tag.get_text(strip=True)
+
 
 class MinecraftWikiScraper:
     BASE_URL = "https://minecraft.wiki/w/"
@@ -25,40 +64,84 @@ class MinecraftWikiScraper:
         "Items"
     }
 
-    def __init__(self, topics, max_retries=3):
+    def __init__(self, topics, max_retries=3, js_required=False):
         """
         Initializes the scraper for multiple topics.
         Args:
             topics (list): List of topics to scrape.
-            max_retries (int): Max retries for Selenium.
+            max_retries (int): Max attempts per page over HTTP.
+            js_required (bool): Render pages in headless Chrome instead of fetching them over HTTP.
         """
         self.topics = topics
         self.max_retries = max_retries
-        self.browser = self.init_browser()
+        self.js_required = js_required
+        self.browser = None  # Started on first Selenium fetch
 
     def init_browser(self):
         """
         Initializes a single Selenium browser instance.
         """
-        options = Options()
-        options.add_argument("--headless")  # Run in headless mode (no GUI)
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=options)
+        return create_chrome_driver()
 
     def fetch_page(self, topic):
         """
-        Fetches the page source using Selenium.
+        Fetches the page and returns it as BeautifulSoup.
+        The wiki serves sections and tables as static HTML, so a plain GET is enough unless js_required is set;
+        a page whose HTML has no article body is rendered with Selenium instead.
+        Retries up to max_retries times with exponential backoff.
+        """
+        if self.js_required:
+            return self.fetch_page_with_selenium(topic)
+
+        url = f"{self.BASE_URL}{topic}"
+        delay = 1
+        for attempt in range(self.max_retries):
+            try:
+                logging.info(f"🚀 Fetching: {url}")
+                response = _session.get(url, timeout=30)
+                response.raise_for_status()
+                soup = BeautifulSoup(response.text, "html.parser", parse_only=CONTENT_ONLY)
+                if soup.find("div", {"class": "mw-parser-output"}) is None:
+                    logging.warning(f"⚠️ No article body in the HTML of {url}, rendering it with Selenium")
+                    return self.fetch_page_with_selenium(topic)
+                return soup
+            except requests.RequestException as e:
+                logging.warning(f"⚠️ Attempt {attempt + 1} to fetch {url} failed: {e}")
+                if attempt == self.max_retries - 1:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def fetch_page_with_selenium(self, topic):
+        """
+        Fetches the page source using Selenium, starting the shared browser on first use.
         """
+        if self.browser is None:
+            self.browser = self.init_browser()
+
         url = f"{self.BASE_URL}{topic}"
-        logging.info(f"🚀 Fetching: {url}")
+        logging.info(f"🚀 Fetching: {url} using Selenium...")
 
         self.browser.get(url)
-        time.sleep(5)  # Allow time for the page to load
-        return BeautifulSoup(self.browser.page_source, "html.parser")
+        # Wait until the article body is present instead of a fixed sleep
+        try:
+            WebDriverWait(self.browser, 10).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "mw-parser-output"))
+            )
+        except TimeoutException:
+            logging.warning(f"⚠️ Timed out waiting for page content: {url}")
+        return BeautifulSoup(self.browser.execute_script(CONTENT_HTML_JS), "html.parser", parse_only=CONTENT_ONLY)
+
+    def parse_page(self, soup, topic):
+        """
+        Extracts sections and, for TABLE_SCRAPING_PAGES, tables in a single walk over the page content.
+        Returns (sections, tables), the same as parse_sections() and extract_tables().
+        """
+        content = soup.find("div", {"class": "mw-parser-output"})
+        if not content:
+            logging.warning(f"⚠️ No content found for {topic}")
+            return [], []
+        return self.walk_content(content, with_sections=True, with_tables=topic in self.TABLE_SCRAPING_PAGES)
 
     def parse_sections(self, soup, topic):
         """
@@ -68,10 +151,24 @@ class MinecraftWikiScraper:
         if not content:
             logging.warning(f"⚠️ No content found for {topic}")
             return []
+        return self.walk_content(content, with_sections=True, with_tables=False)[0]
 
-        sections = []
-        intro_paragraph = ""
+    def extract_tables(self, soup, topic):
+        """
+        Extracts tables from the page.
+        """
+        if topic not in self.TABLE_SCRAPING_PAGES:
+            return []
+
+        content = soup.find("div", {"class": "mw-parser-output"})
+        if not content:
+            return []
+        return self.walk_content(content, with_sections=False, with_tables=True)[1]
 
+    def extract_intro(self, content):
+        """
+        Returns the first paragraph after hatnotes/figures and removes it from the content.
+        """
         for child in content.children:
             if not child.name:
                 continue
@@ -82,80 +179,98 @@ class MinecraftWikiScraper:
             if child.name == "p":
                 intro_paragraph = child.get_text(separator=" ").strip()
                 child.decompose()
-                break
+                return intro_paragraph
+        return ""
 
-        if intro_paragraph:
-            sections.append({
-                "heading": "Introduction",
-                "text": intro_paragraph,
-                "subsections": []
-            })
+    def walk_content(self, content, with_sections=True, with_tables=False):
+        """
+        Walks the page content once, building sections and/or tables.
+        Returns (sections, tables); a list that was not requested is left empty.
+        """
+        sections = []
+        tables = []
+
+        if with_sections:
+            intro_paragraph = self.extract_intro(content)
+            if intro_paragraph:
+                sections.append({
+                    "heading": "Introduction",
+                    "text": intro_paragraph,
+                    "subsections": []
+                })
+
+        tags = ["h2", "h3"]
+        if with_sections:
+            tags += ["p", "ul", "ol"]
+        if with_tables:
+            tags.append("table")
 
         current_section = None
-        for element in content.find_all(["h2", "h3", "p", "ul", "ol"]):
-            if element.name == "h2":
-                if current_section:
-                    sections.append(current_section)
-                heading_text = element.text.strip().replace("[edit | edit source]", "")
-                current_section = {"heading": heading_text, "text": "", "subsections": []}
-            elif element.name == "h3":
-                if current_section:
-                    subheading_text = element.text.strip().replace("[edit | edit source]", "")
-                    current_section["subsections"].append({"subheading": subheading_text, "text": ""})
-            elif element.name in ["p", "ul", "ol"]:
-                text_content = element.get_text(separator=" ").strip() + " "
-                if current_section:
-                    if current_section["subsections"]:
-                        current_section["subsections"][-1]["text"] += text_content
-                    else:
-                        current_section["text"] += text_content
+        current_heading = None  # Closest h2/h3, used to title tables without a <caption>
+        # Paragraphs of the open section/subsection are collected and joined once it closes,
+        # instead of growing its "text" string with += per element
+        text_target = None
+        text_parts = []
+        for element in content.find_all(tags):
+            if element.name in ("h2", "h3"):
+                if with_tables:
+                    current_heading = element.get_text(strip=True).replace(EDIT_LINK, "")
+                if not with_sections:
+                    continue
+                if element.name == "h2":
+                    if current_section:
+                        text_target["text"] = "".join(text_parts)
+                        sections.append(current_section)
+                    heading_text = element.text.strip().replace(EDIT_LINK, "")
+                    current_section = {"heading": heading_text, "text": "", "subsections": []}
+                    text_target, text_parts = current_section, []
+                elif current_section:
+                    text_target["text"] = "".join(text_parts)
+                    subheading_text = element.text.strip().replace(EDIT_LINK, "")
+                    subsection = {"subheading": subheading_text, "text": ""}
+                    current_section["subsections"].append(subsection)
+                    text_target, text_parts = subsection, []
+            elif element.name == "table":
+                table = self.parse_table(element, current_heading)
+                if table:
+                    tables.append(table)
+            elif current_section:
+                text_parts.append(element.get_text(separator=" ").strip() + " ")
 
         if current_section:
+            text_target["text"] = "".join(text_parts)
             sections.append(current_section)
 
-        return sections
+        return sections, tables
 
-    def extract_tables(self, soup, topic):
+    def parse_table(self, element, current_heading):
         """
-        Extracts tables from the page.
+        Converts a <table> into {title, headers, rows}, or None if it has no header or data rows.
         """
-        if topic not in self.TABLE_SCRAPING_PAGES:
-            return []
-
-        content = soup.find("div", {"class": "mw-parser-output"})
-        if not content:
-            return []
-
-        tables = []
-        current_section = None
-        for element in content.find_all(["h2", "h3", "table"]):
-            if element.name in ["h2", "h3"]:
-                heading_text = element.get_text(strip=True).replace("[edit | edit source]", "")
-                current_section = heading_text
-
-            if element.name == "table":
-                table_title = element.find("caption")
-                if table_title:
-                    table_title = table_title.get_text(strip=True)
-                else:
-                    table_title = current_section or "Unknown Table"
-
-                headers = [th.get_text(strip=True) for th in element.find_all("th")]
-                rows = []
-                tr_list = element.find_all("tr")
-                for row in tr_list[1:]:
-                    columns = [td.get_text(strip=True) for td in row.find_all("td")]
-                    if columns:
-                        rows.append(dict(zip(headers, columns)))
-
-                if headers and rows:
-                    tables.append({
-                        "title": table_title,
-                        "headers": headers,
-                        "rows": rows
-                    })
-                    logging.info(f"📋 Extracted table: {table_title} (Rows: {len(rows)})")
-        return tables
+        table_title = element.find("caption")
+        if table_title:
+            table_title = cell_text(table_title)
+        else:
+            table_title = current_heading or "Unknown Table"
+
+        tr_list = element.find_all("tr")
+        # Column names come from the first row, the one skipped as data below;
+        # row-header <th> cells further down the table are not column names
+        headers = [cell_text(th) for th in tr_list[0].find_all("th")] if tr_list else []
+        rows = []
+        for row in tr_list[1:]:
+            columns = [cell_text(td) for td in row.find_all("td")]
+            if columns:
+                rows.append(dict(zip(headers, columns)))
+
+        if headers and rows:
+            logging.info(f"📋 Extracted table: {table_title} (Rows: {len(rows)})")
+            return {
+                "title": table_title,
+                "headers": headers,
+                "rows": rows
+            }
+        return None
 
     def extract_crafting_recipe(self, soup):
         """
@@ -176,25 +291,25 @@ class MinecraftWikiScraper:
                         cells = rows[1].find_all("td")
                         if len(cells) >= 2:
                             ingredients = cells[0].get_text(separator=" ").strip()
-                            grid_html = str(cells[1])
-                            grid_cleaned = self.parse_crafting_grid(grid_html)
+                            # Read the grid from the tree already in memory instead of re-parsing its HTML
+                            grid_cleaned = self.parse_crafting_grid(cells[1])
                             logging.info("🔍 Crafting recipe found and extracted.")
+                            # The grid's raw HTML is not saved; grid_cleaned carries everything the preprocessor uses
                             return {
                                 "ingredients": ingredients,
-                                "grid_raw": grid_html,
                                 "grid_cleaned": grid_cleaned
                             }
         logging.info("ℹ️ No crafting recipe table found on this page.")
         return None
 
-    def parse_crafting_grid(self, grid_html):
+    def parse_crafting_grid(self, grid_cell):
         """
-        Parses the raw grid HTML for a crafting recipe.
+        Parses the grid of a crafting recipe, given as its Tag (or as raw HTML, which is parsed first).
         First attempts to use the "data-minetip-title" attribute,
         and if that is not available, falls back to the <a> tag's "title" attribute.
         Returns a list of rows, where each row is a list of ingredient names.
         """
-        grid_soup = BeautifulSoup(grid_html, "html.parser")
+        grid_soup = BeautifulSoup(grid_cell, "html.parser") if isinstance(grid_cell, str) else grid_cell
         grid = []
         # Find all rows using the 'mcui-row' class.
         rows = grid_soup.find_all("span", class_="mcui-row")
@@ -234,32 +349,47 @@ class MinecraftWikiScraper:
         if crafting_recipe:
             data["crafting_recipe"] = crafting_recipe
 
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # Write to a temp file and swap it in, so a crash never leaves a half-written JSON behind
+        tmp_path = f"{filename}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, filename)
         logging.info(f"✅ Data saved: {filename}")
 
     def run(self):
         """
-        Scrapes multiple pages in one Selenium session.
+        Scrapes multiple pages, sharing one HTTP session (or one Selenium browser when js_required is set).
         """
+        scraped = scraped_topics()
         for topic in self.topics:
-            json_path = f"data/raw/{topic}.json"
             # Skip if already scraped
-            if os.path.exists(json_path):
+            if topic in scraped:
                 logging.info(f"⏭️  Skipping {topic} (Already Scraped)")
                 continue
 
             try:
                 soup = self.fetch_page(topic)
-                sections = self.parse_sections(soup, topic)
-                tables = self.extract_tables(soup, topic)
+                sections, tables = self.parse_page(soup, topic)
                 # Extract crafting recipe (if it exists)
                 crafting_recipe = self.extract_crafting_recipe(soup)
                 self.save_to_json(topic, sections, tables, crafting_recipe)
             except Exception as e:
                 logging.error(f"❌ Error scraping {topic}: {e}")
 
-        self.browser.quit()  # Close browser after all pages are scraped
+        if self.browser is not None:
+            self.browser.quit()  # Close browser after all pages are scraped
+            self.browser = None
+
+
+def scraped_topics(folder="data/raw"):
+    """
+    Returns the set of topics that already have a JSON file in folder, from one directory listing.
+    """
+    try:
+        with os.scandir(folder) as entries:
+            return {entry.name[:-5] for entry in entries if entry.name.endswith(".json")}
+    except FileNotFoundError:
+        return set()
 
 
 def load_pages_json(json_file="data/pages.json"):
@@ -270,8 +400,34 @@ def load_pages_json(json_file="data/pages.json"):
         logging.error(f"File {json_file} not found.")
         return {"pages": []}
 
-    with open(json_file, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(json_file, "rb") as f:
+        return orjson.loads(f.read())
+
+
+async def scrape_batches_async(pages, batch_size=5, max_concurrency=4, **scraper_kwargs):
+    """
+    Scrapes pages in batches of batch_size, running up to max_concurrency batches at once in
+    worker threads so network waits overlap. Each batch still pauses briefly after it finishes
+    to be polite to the server.
+    """
+    # Drop already-scraped pages up front so batches stay full and no idle batch waits out the delay
+    scraped = scraped_topics()
+    pending = [page for page in pages if page not in scraped]
+    if len(pending) < len(pages):
+        logging.info(f"⏭️  Skipping {len(pages) - len(pending)} pages (Already Scraped)")
+    pages = pending
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    def scrape(batch):
+        MinecraftWikiScraper(batch, **scraper_kwargs).run()
+        time.sleep(2)  # Short delay to be polite to the server
+
+    async def bounded(batch):
+        async with semaphore:
+            await asyncio.to_thread(scrape, batch)
+
+    await asyncio.gather(*(bounded(pages[i : i + batch_size]) for i in range(0, len(pages), batch_size)))
 
 
 def main():
@@ -282,12 +438,9 @@ def main():
     pages = pages_data.get("pages", [])
 
     batch_size = 5  # Change this to control how many pages to scrape per batch
+    max_concurrency = 4  # Batches scraped at the same time
 
-    for i in range(0, len(pages), batch_size):
-        batch = pages[i : i + batch_size]
-        scraper = MinecraftWikiScraper(batch)
-        scraper.run()
-        time.sleep(2)  # Short delay to be polite to the server
+    asyncio.run(scrape_batches_async(pages, batch_size, max_concurrency))
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
-import json
+import asyncio
+import orjson
 from src.pipeline.retriever import Retriever
 from src.pipeline.generator import Generator
 from src.evaluator.faithfulness_eval import FaithfulnessEvaluator
@@ -24,52 +25,61 @@ evaluation_model = LMStudioEvaluationModel()
 faithfulness_eval = FaithfulnessEvaluator(retriever, generator, evaluation_model)
 
 # Load Ground Truth QnA
-with open("data/ground_truth_qna.json", "r") as f:
-    ground_truth_qna = json.load(f)
+with open("data/ground_truth_qna.json", "rb") as f:
+    ground_truth_qna = orjson.loads(f.read())
 
-# Run evaluation for each query in the ground truth QnA
-for entry in ground_truth_qna:
-    query = entry["question"]
-    ground_truth_answer = entry["answer"]
+queries = [entry["question"] for entry in ground_truth_qna]
+ground_truth_answers = [entry["answer"] for entry in ground_truth_qna]
 
-    # Retrieve Chunks ONCE and pass them to all methods
-    retrieved_chunks, _ = retriever.query(query, top_k=5)
+# Retrieve Chunks ONCE for all queries (one encode call, one ChromaDB query) and pass them to all methods
+# The chunks' stored embeddings come back with them, so they are never re-encoded
+retrieved = retriever.query_batch(queries, top_k=5, with_embeddings=True)
+all_retrieved_chunks = [retrieved_chunks for retrieved_chunks, _, _ in retrieved]
+all_chunk_embeddings = [chunk_embeddings for _, _, chunk_embeddings in retrieved]
 
-    # Generate the answer for the given query
-    generated_answer, _ = generator.generate_response(query, retrieved_chunks, [])
+# Generate all answers concurrently instead of one request at a time
+generated = asyncio.run(generator.generate_many_async(queries, all_retrieved_chunks, max_concurrency=8))
 
-    # Compute faithfulness evaluation metrics (Non-LLM)
-    blobwise_answer_similarity = faithfulness_eval.compute_blobwise_similarity(query, retrieved_chunks, generated_answer)
-    chunkwise_answer_similarity = faithfulness_eval.compute_chunkwise_similarity(generated_answer, retrieved_chunks)
-    faithful_coverage = faithfulness_eval.compute_faithful_coverage(ground_truth_answer, generated_answer)
-    # negative_faithfulness = faithfulness_eval.compute_negative_faithfulness(query, retrieved_chunks, generated_answer)
+try:
+    # Run evaluation for each query in the ground truth QnA
+    for query, ground_truth_answer, retrieved_chunks, chunk_embeddings, (generated_answer, _) in zip(
+        queries, ground_truth_answers, all_retrieved_chunks, all_chunk_embeddings, generated
+    ):
+        # Compute faithfulness evaluation metrics (Non-LLM)
+        embeddings = faithfulness_eval.precompute(retrieved_chunks, generated_answer, chunk_embeddings)
+        blobwise_answer_similarity = faithfulness_eval.compute_blobwise_similarity(query, retrieved_chunks, generated_answer, embeddings)
+        chunkwise_answer_similarity = faithfulness_eval.compute_chunkwise_similarity(generated_answer, retrieved_chunks, embeddings)
+        faithful_coverage = faithfulness_eval.compute_faithful_coverage(ground_truth_answer, generated_answer)
+        # negative_faithfulness = faithfulness_eval.compute_negative_faithfulness(query, retrieved_chunks, generated_answer)
 
-    # Compute LLM-based faithfulness evaluation metrics, with error handling for API exhaustion
-    try:
-        faithfulness_score_llm = faithfulness_eval.llm_as_judge(query, retrieved_chunks, generated_answer)
-        faithful_coverage_llm = faithfulness_eval.llm_faithful_coverage(query, ground_truth_answer, generated_answer)
-    except Exception as e:
-        logger.error(f"❌ Error generating response for LLM-based evaluation: {e}")
-        faithfulness_score_llm = "FDTKE"  # Failed due to key exhaustion
-        faithful_coverage_llm = "FDTKE"  # Failed due to key exhaustion
+        # Compute LLM-based faithfulness evaluation metrics, with error handling for API exhaustion
+        try:
+            faithfulness_score_llm, faithful_coverage_llm = faithfulness_eval.llm_scores(query, ground_truth_answer, retrieved_chunks, generated_answer)
+        except Exception as e:
+            logger.error(f"❌ Error generating response for LLM-based evaluation: {e}")
+            faithfulness_score_llm = "FDTKE"  # Failed due to key exhaustion
+            faithful_coverage_llm = "FDTKE"  # Failed due to key exhaustion
 
-    # Prepare the result data for logging
-    result_data = {
-        "query": query,
-        "ground_truth_answer": ground_truth_answer,
-        "generated_answer": faithfulness_eval.generator.generate_response(query, retrieved_chunks, []),
-        "blobwise_answer_similarity": blobwise_answer_similarity,
-        "avg_chunkwise_answer_similarity": chunkwise_answer_similarity['avg_chunkwise_score'],
-        "max_chunkwise_answer_similarity": chunkwise_answer_similarity['max_chunkwise_score'],
-        "faithful_coverage": faithful_coverage,
-        # "negative_faithfulness": negative_faithfulness,
-        "faithfulness_score_llm": faithfulness_score_llm,
-        "faithful_coverage_llm": faithful_coverage_llm
-    }
+        # Prepare the result data for logging
+        result_data = {
+            "query": query,
+            "ground_truth_answer": ground_truth_answer,
+            "generated_answer": generated_answer,
+            "blobwise_answer_similarity": blobwise_answer_similarity,
+            "avg_chunkwise_answer_similarity": chunkwise_answer_similarity['avg_chunkwise_score'],
+            "max_chunkwise_answer_similarity": chunkwise_answer_similarity['max_chunkwise_score'],
+            "faithful_coverage": faithful_coverage,
+            # "negative_faithfulness": negative_faithfulness,
+            "faithfulness_score_llm": faithfulness_score_llm,
+            "faithful_coverage_llm": faithful_coverage_llm
+        }
 
-    # Log the results
-    faithfulness_eval.logger.log(result_data)
+        # Log the results
+        faithfulness_eval.logger.log(result_data)
 
-logger.info("Faithfulness Evaluation completed!")
-faithfulness_eval.logger.log_to_excel()
-logger.info("Results saved to excel.")
+    logger.info("Faithfulness Evaluation completed!")
+    faithfulness_eval.logger.log_to_excel()
+    logger.info("Results saved to excel.")
+finally:
+    # Rows still in the buffer are written even if a query raises partway through
+    faithfulness_eval.logger.flush()
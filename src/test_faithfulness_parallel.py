@@ -1,7 +1,7 @@
-import json
+import asyncio
+import orjson
 import os
 from dotenv import load_dotenv
-from multiprocessing import Pool
 from src.pipeline.retriever import Retriever
 from src.pipeline.generator import Generator
 from src.evaluator.faithfulness_eval import FaithfulnessEvaluator
@@ -16,33 +16,35 @@ OPENAI_API_KEY = os.getenv("OPENAI")
 logger = setup_logger("logs/test_faithfulness_parallel.log")
 parallel_logger = EvaluationLogger(eval_type="faithfulness")
 
-def evaluate_entry(entry):
+MAX_CONCURRENCY = 8  # Entries whose metrics and judge prompts are in flight at once
+
+
+async def evaluate_entry(faithfulness_eval, entry, retrieved_chunks, chunk_embeddings, generated_answer, semaphore):
+    query = entry["question"]
+    ground_truth_answer = entry["answer"]
     try:
-        retriever = Retriever()
-        generator = Generator()
-        evaluation_model = LMStudioEvaluationModel(api_url="http://10.99.22.156:1235/v1/chat/completions")
-        faithfulness_eval = FaithfulnessEvaluator(retriever, generator, evaluation_model)
-
-        query = entry["question"]
-        ground_truth_answer = entry["answer"]
-        retrieved_chunks, _ = retriever.query(query, top_k=5)
-        generated_answer, _ = generator.generate_response(query, retrieved_chunks, [])
-
-        # Non-LLM metrics
-        blobwise = faithfulness_eval.compute_blobwise_similarity(query, retrieved_chunks, generated_answer)
-        chunkwise = faithfulness_eval.compute_chunkwise_similarity(generated_answer, retrieved_chunks)
-        coverage = faithfulness_eval.compute_faithful_coverage(ground_truth_answer, generated_answer)
-
-        # LLM-based metrics
-        try:
-            judge_score = faithfulness_eval.llm_as_judge(query, retrieved_chunks, generated_answer)
-            coverage_llm = faithfulness_eval.llm_faithful_coverage(query, ground_truth_answer, generated_answer)
-        except Exception as e:
-            judge_score = "FDTKE"
-            coverage_llm = "FDTKE"
-            print(f"❌ LLM Evaluation failed for '{query}': {e}")
-
-        result_data = {
+        async with semaphore:
+            # Non-LLM metrics are CPU-bound (torch releases the GIL), so they run in a worker thread
+            def non_llm_metrics():
+                embeddings = faithfulness_eval.precompute(retrieved_chunks, generated_answer, chunk_embeddings)
+                blobwise = faithfulness_eval.compute_blobwise_similarity(query, retrieved_chunks, generated_answer, embeddings)
+                chunkwise = faithfulness_eval.compute_chunkwise_similarity(generated_answer, retrieved_chunks, embeddings)
+                coverage = faithfulness_eval.compute_faithful_coverage(ground_truth_answer, generated_answer)
+                return blobwise, chunkwise, coverage
+
+            blobwise, chunkwise, coverage = await asyncio.to_thread(non_llm_metrics)
+
+            # LLM-based metrics
+            try:
+                judge_score, coverage_llm = await faithfulness_eval.llm_scores_async(
+                    query, ground_truth_answer, retrieved_chunks, generated_answer
+                )
+            except Exception as e:
+                judge_score = "FDTKE"
+                coverage_llm = "FDTKE"
+                print(f"❌ LLM Evaluation failed for '{query}': {e}")
+
+        return {
             "query": query,
             "ground_truth_answer": ground_truth_answer,
             "generated_answer": generated_answer,
@@ -54,23 +56,50 @@ def evaluate_entry(entry):
             "faithful_coverage_llm": coverage_llm
         }
 
-        parallel_logger.log(result_data)
-        return result_data
-
     except Exception as e:
-        print(f"❌ Fatal error in entry: {entry['question']} → {e}")
-        parallel_logger.log_error(entry["question"], str(e))
-        return None
+        print(f"❌ Fatal error in entry: {query} → {e}")
+        return {"query": query, "error": str(e)}
+
+
+async def evaluate_all(ground_truth_qna):
+    """
+    Evaluates every entry in one process with one copy of the models: retrieval is one batch,
+    generation and judging run concurrently, at most MAX_CONCURRENCY entries at a time.
+    """
+    retriever = Retriever()
+    generator = Generator()
+    evaluation_model = LMStudioEvaluationModel(api_url="http://10.99.22.156:1235/v1/chat/completions")
+    faithfulness_eval = FaithfulnessEvaluator(retriever, generator, evaluation_model)
+
+    queries = [entry["question"] for entry in ground_truth_qna]
+    retrieved = await asyncio.to_thread(retriever.query_batch, queries, 5, True)
+    all_retrieved_chunks = [retrieved_chunks for retrieved_chunks, _, _ in retrieved]
+    generated = await generator.generate_many_async(queries, all_retrieved_chunks, max_concurrency=MAX_CONCURRENCY)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    return await asyncio.gather(*(
+        evaluate_entry(faithfulness_eval, entry, retrieved_chunks, chunk_embeddings, generated_answer, semaphore)
+        for entry, (retrieved_chunks, _, chunk_embeddings), (generated_answer, _) in zip(ground_truth_qna, retrieved, generated)
+    ))
 
 
 if __name__ == "__main__":
-    with open("data/ground_truth_qna.json", "r") as f:
-        ground_truth_qna = json.load(f)
+    with open("data/ground_truth_qna.json", "rb") as f:
+        ground_truth_qna = orjson.loads(f.read())
+
+    print(f"🚀 Starting concurrent faithfulness evaluation ({MAX_CONCURRENCY} entries in flight)...")
+    results = asyncio.run(evaluate_all(ground_truth_qna))
 
-    print("🚀 Starting parallel faithfulness evaluation with 4 workers...")
-    with Pool(processes=4) as pool:
-        pool.map(evaluate_entry, ground_truth_qna)
+    try:
+        for result in results:
+            if "error" in result:
+                parallel_logger.log_error(result["query"], result["error"])
+            else:
+                parallel_logger.log(result)
 
-    print("✅ All evaluations complete. Saving to Excel...")
-    parallel_logger.log_to_excel()
-    print("📊 Excel saved. Logs written to logs/test_faithfulness_parallel.log")
+        print("✅ All evaluations complete. Saving to Excel...")
+        parallel_logger.log_to_excel()
+        print("📊 Excel saved. Logs written to logs/test_faithfulness_parallel.log")
+    finally:
+        # Rows still in the buffer are written even if logging or the Excel export fails
+        parallel_logger.flush()
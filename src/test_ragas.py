@@ -1,7 +1,7 @@
-import json
+import asyncio
+import orjson
 import os
-from src.pipeline.retriever import Retriever
-from src.pipeline.generator import Generator
+from src.pipeline.pipeline import RAGPipeline
 from src.evaluator.ragas_eval import RagasEvaluator
 from src.log_manager import setup_logger
 logger = setup_logger("logs/ragas_eval.log")
@@ -10,21 +10,21 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Load Ground Truth QnA
-with open("data/ground_truth_qna.json", "r") as f:
-    ground_truth_qna = json.load(f)
+with open("data/ground_truth_qna.json", "rb") as f:
+    ground_truth_qna = orjson.loads(f.read())
 
-retriever = Retriever()
-generator = Generator()
+rag_pipeline = RAGPipeline()
+
+# Retrieve and generate concurrently: one row's retrieval overlaps another row's generation
+queries = [entry["question"] for entry in ground_truth_qna]
+pipeline_outputs = asyncio.run(rag_pipeline.process_queries_async(queries, max_concurrency=8))
 
 results = []
 
-for entry in ground_truth_qna:
+for entry, (retrieved_chunks, generated_answer, _) in zip(ground_truth_qna, pipeline_outputs):
     query = entry["question"]
     ground_truth_answer = entry["answer"]
 
-    retrieved_chunks, _ = retriever.query(query, top_k=5)
-    generated_answer, _ = generator.generate_response(query, retrieved_chunks, [])
-
     results.append({
         "query": query,
         "ground_truth_answer": ground_truth_answer,
@@ -1,5 +1,6 @@
-import json
+import orjson
 import os
+import sys
 from dotenv import load_dotenv
 from src.pipeline.retriever import Retriever
 from src.pipeline.generator import Generator
@@ -15,54 +16,70 @@ logger = EvaluationLogger(eval_type="retrieval")
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI")
 
+# Query, ground-truth and chunk embeddings are cached on disk across runs; pass --no-cache to recompute them
+EMBEDDING_CACHE_PATH = None if "--no-cache" in sys.argv else "data/embeddings/bge_cache.sqlite"
+
 # Initialize retriever, generator, and evaluator
-retriever = Retriever()
+retriever = Retriever(cache_path=EMBEDDING_CACHE_PATH)
 generator = Generator()
 # evaluation_model = ChatGPTEvaluationModel(OPENAI_API_KEY)
 evaluation_model = LMStudioEvaluationModel()
-retrieval_eval = RetrievalEvaluator(retriever, generator, evaluation_model)
+retrieval_eval = RetrievalEvaluator(retriever, generator, evaluation_model, cache_path=EMBEDDING_CACHE_PATH)
 
 
 # Load Ground Truth QnA
-with open("data/ground_truth_qna.json", "r") as f:
-    ground_truth_qna = json.load(f)
+with open("data/ground_truth_qna.json", "rb") as f:
+    ground_truth_qna = orjson.loads(f.read())
+
+queries = [qna["question"] for qna in ground_truth_qna]
+ground_truth_answers = [qna["answer"] for qna in ground_truth_qna]
+
+# ✅ Retrieve Chunks ONCE for all queries and pass them to all methods
+retrieved = retriever.query_batch(queries, top_k=5)
+all_retrieved_chunks = [retrieved_chunks for retrieved_chunks, _ in retrieved]
 
-# Process all QnA pairs
-for idx, qna in enumerate(ground_truth_qna):
-    query = qna["question"]
-    ground_truth_answer = qna["answer"]
+# ✅ Compute non-LLM retrieval metrics for all rows in one batch
+rows = list(zip(queries, ground_truth_answers, all_retrieved_chunks))
+batch_metrics = retrieval_eval.evaluate_many(rows)
 
-    # ✅ Retrieve Chunks ONCE and pass them to all methods
-    retrieved_chunks, _ = retriever.query(query, top_k=5)
+# ✅ LLM-based metrics: one judge prompt per row, with up to 16 rows in flight at once
+batch_llm_scores = retrieval_eval.compute_llm_metrics_many(rows, max_concurrency=16)
 
-    # ✅ Compute retrieval evaluation metrics (with LLM-based checks)
-    context_precision = retrieval_eval.compute_context_precision(query, retrieved_chunks)
-    context_recall = retrieval_eval.compute_context_recall(query, ground_truth_answer, retrieved_chunks)
-    # context_overlap = retrieval_eval.compute_context_overlap(query, ground_truth_answer, retrieved_chunks)
-    # negative_retrieval = retrieval_eval.compute_negative_retrieval(query, retrieved_chunks)
+try:
+    # Process all QnA pairs
+    for query, ground_truth_answer, retrieved_chunks, metrics, llm_scores in zip(
+        queries, ground_truth_answers, all_retrieved_chunks, batch_metrics, batch_llm_scores
+    ):
+        context_precision = metrics["context_precision"]
+        context_recall = metrics["context_recall"]
+        # context_overlap = retrieval_eval.compute_context_overlap(query, ground_truth_answer, retrieved_chunks)
+        # negative_retrieval = retrieval_eval.compute_negative_retrieval(query, retrieved_chunks)
 
-    # ✅ LLM-based metrics 
-    context_precision_llm = retrieval_eval.compute_context_precision_with_llm(query, retrieved_chunks)
-    context_recall_llm = retrieval_eval.compute_context_recall_with_llm(query, ground_truth_answer, retrieved_chunks)
-    retrieval_precision_llm = retrieval_eval.compute_retrieval_precision_with_llm(query, retrieved_chunks)
-    # context_overlap_llm = retrieval_eval.compute_context_overlap_with_llm(query, ground_truth_answer, retrieved_chunks)
-    negative_retrieval_llm = retrieval_eval.compute_negative_retrieval_with_llm(query, retrieved_chunks)
+        # ✅ LLM-based metrics 
+        context_precision_llm = llm_scores["context_precision"]
+        context_recall_llm = llm_scores["context_recall"]
+        retrieval_precision_llm = llm_scores["retrieval_precision"]
+        # context_overlap_llm = retrieval_eval.compute_context_overlap_with_llm(query, ground_truth_answer, retrieved_chunks)
+        negative_retrieval_llm = llm_scores["negative_retrieval"]
 
-    # ✅ Log results for this query
-    result = {
-        "query": query,
-        "Ground Truth Answer": ground_truth_answer,
-        "Context Precision":context_precision["combined_precision_score"], # Individual cosine, BM25 scores can also be extracted
-        "Context Recall": context_recall,
-        # "context_overlap": context_overlap,
-        # "negative_retrieval": negative_retrieval,
-        "Context Precision (llm)": context_precision_llm,
-        "Context Recall (llm)": context_recall_llm,
-        "Retrieval Precision (llm)": retrieval_precision_llm,
-        # "context_overlap_llm": context_overlap_llm,
-        "Negative Retrieval (llm)": negative_retrieval_llm
-    }
-    logger.log(result)
+        # ✅ Log results for this query
+        result = {
+            "query": query,
+            "Ground Truth Answer": ground_truth_answer,
+            "Context Precision":context_precision["combined_precision_score"], # Individual cosine, BM25 scores can also be extracted
+            "Context Recall": context_recall,
+            # "context_overlap": context_overlap,
+            # "negative_retrieval": negative_retrieval,
+            "Context Precision (llm)": context_precision_llm,
+            "Context Recall (llm)": context_recall_llm,
+            "Retrieval Precision (llm)": retrieval_precision_llm,
+            # "context_overlap_llm": context_overlap_llm,
+            "Negative Retrieval (llm)": negative_retrieval_llm
+        }
+        logger.log(result)
 
-# ✅ Convert all logs to Excel (Run separately if needed)
-logger.log_to_excel()
+    # ✅ Convert all logs to Excel (Run separately if needed)
+    logger.log_to_excel()
+finally:
+    # Rows still in the buffer are written even if a query raises partway through
+    logger.flush()
@@ -1,7 +1,7 @@
-import json
+import orjson
 import os
 from dotenv import load_dotenv
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.pipeline.retriever import Retriever
 from src.pipeline.generator import Generator
 from src.evaluator.retrieval_eval import RetrievalEvaluator
@@ -16,29 +16,39 @@ OPENAI_API_KEY = os.getenv("OPENAI")
 logger = setup_logger("logs/test_retrieval_parallel.log")
 parallel_logger = EvaluationLogger(eval_type="retrieval")
 
-def evaluate_entry(entry):
-    try:
-        retriever = Retriever()
-        generator = Generator()
-        evaluation_model = LMStudioEvaluationModel("http://10.99.22.156:1235/v1/chat/completions")
-        retrieval_eval = RetrievalEvaluator(retriever, generator, evaluation_model)
+MAX_WORKERS = 16
+
+# Built once in the main process and shared by all worker threads
+retriever = None
+generator = None
+retrieval_eval = None
+
 
+def init_models():
+    """Loads the retriever, generator and judge once; the threads share them."""
+    global retriever, generator, retrieval_eval
+    retriever = Retriever()
+    generator = Generator()
+    evaluation_model = LMStudioEvaluationModel("http://10.99.22.156:1235/v1/chat/completions")
+    retrieval_eval = RetrievalEvaluator(retriever, generator, evaluation_model)
+
+
+def evaluate_entry(entry, retrieved_chunks):
+    try:
         query = entry["question"]
         ground_truth_answer = entry["answer"]
 
-        # Retrieve chunks
-        retrieved_chunks, _ = retriever.query(query, top_k=5)
-
         # Non-LLM metrics
         context_precision = retrieval_eval.compute_context_precision(query, retrieved_chunks)
         context_recall = retrieval_eval.compute_context_recall(query, ground_truth_answer, retrieved_chunks)
 
         # LLM-based metrics
         try:
-            context_precision_llm = retrieval_eval.compute_context_precision_with_llm(query, retrieved_chunks)
-            context_recall_llm = retrieval_eval.compute_context_recall_with_llm(query, ground_truth_answer, retrieved_chunks)
-            retrieval_precision_llm = retrieval_eval.compute_retrieval_precision_with_llm(query, retrieved_chunks)
-            negative_retrieval_llm = retrieval_eval.compute_negative_retrieval_with_llm(query, retrieved_chunks)
+            llm_scores = retrieval_eval.compute_llm_metrics_bundle(query, ground_truth_answer, retrieved_chunks)
+            context_precision_llm = llm_scores["context_precision"]
+            context_recall_llm = llm_scores["context_recall"]
+            retrieval_precision_llm = llm_scores["retrieval_precision"]
+            negative_retrieval_llm = llm_scores["negative_retrieval"]
         except Exception as e:
             print(f"❌ LLM Evaluation failed for '{query}': {e}")
             context_precision_llm = "FDTKE"
@@ -57,23 +67,45 @@ def evaluate_entry(entry):
             "negative_retrieval_llm": negative_retrieval_llm
         }
 
-        parallel_logger.log(result)
         return result
 
     except Exception as e:
         print(f"❌ Fatal error in entry: {entry['question']} → {e}")
-        parallel_logger.log_error(entry["question"], str(e))
-        return None
+        return {"query": entry["question"], "error": str(e)}
 
 
 if __name__ == "__main__":
-    with open("data/ground_truth_qna.json", "r") as f:
-        ground_truth_qna = json.load(f)
+    with open("data/ground_truth_qna.json", "rb") as f:
+        ground_truth_qna = orjson.loads(f.read())
+
+    init_models()
+
+    # Retrieve chunks for all entries with one encode call and one ChromaDB query
+    retrieved = retriever.query_batch([entry["question"] for entry in ground_truth_qna], top_k=5)
 
-    print("🚀 Starting parallel retrieval evaluation with 4 workers...")
-    with Pool(processes=4) as pool:
-        pool.map(evaluate_entry, ground_truth_qna)
+    # The work is dominated by judge round trips, so threads overlap it without a model copy per process
+    print(f"🚀 Starting parallel retrieval evaluation with {MAX_WORKERS} threads...")
+    results = [None] * len(ground_truth_qna)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(evaluate_entry, entry, retrieved_chunks): idx
+            for idx, (entry, (retrieved_chunks, _)) in enumerate(zip(ground_truth_qna, retrieved))
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            print(f"✅ {done}/{len(futures)} entries evaluated")
+
+    try:
+        # Log from the main thread, in input order
+        for result in results:
+            if "error" in result:
+                parallel_logger.log_error(result["query"], result["error"])
+            else:
+                parallel_logger.log(result)
 
-    print("✅ All evaluations complete. Saving to Excel...")
-    parallel_logger.log_to_excel()
-    print("📊 Excel saved. Logs written to logs/test_retrieval_parallel.log")
+        print("✅ All evaluations complete. Saving to Excel...")
+        parallel_logger.log_to_excel()
+        print("📊 Excel saved. Logs written to logs/test_retrieval_parallel.log")
+    finally:
+        # Rows still in the buffer are written even if logging or the Excel export fails
+        parallel_logger.flush()
@@ -0,0 +1,28 @@
+import re
+from functools import lru_cache
+
+# Shared by the scraper and scraperv2 preprocessors.
+# Wiki markup removed by clean_text, applied in this order. Removing [hide]/edit links
+# before the generic bracket pass can change what it matches, so the passes stay separate.
+_EDIT_HIDE_RE = re.compile(r"\[edit\s*\|\s*edit source\]|\[hide\]", re.IGNORECASE)
+_FOOTNOTE_RE = re.compile(r"(?:Jump up to|See also):.*", re.IGNORECASE)
+_BRACKET_RE = re.compile(r"\[.*?\]")
+
+
+@lru_cache(maxsize=16384)
+def clean_wiki_text(text):
+    """
+    Strips wiki markup and collapses whitespace. Pure, so results are memoized:
+    table headers and keys repeat on every row and many cell values repeat across rows.
+    """
+    # Most cells and headings carry no markup, so skip the regex passes that cannot match
+    if "[" in text:
+        text = _EDIT_HIDE_RE.sub("", text)
+    if ":" in text:
+        text = _FOOTNOTE_RE.sub("", text)
+    # ↑ is a literal; dropping it before the bracket pass does not change what that pass matches
+    text = text.replace("↑", "")
+    if "[" in text:
+        text = _BRACKET_RE.sub("", text)
+    # Collapse whitespace runs to single spaces and trim
+    return " ".join(text.split())
@@ -0,0 +1,68 @@
+import re
+from collections import deque
+
+# Shared by the scraper and scraperv2 chunkers
+# Separators tried in order for sections that exceed chunk_size (if is_table=False)
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+_SEPARATOR_RES = {sep: re.compile(f"({re.escape(sep)})") for sep in SEPARATORS}
+
+
+def _split_keeping_separator(text, separator):
+    """Splits text on separator, keeping each separator at the start of the piece that follows it."""
+    parts = _SEPARATOR_RES[separator].split(text)
+    pieces = [parts[0]] + [parts[i] + parts[i + 1] for i in range(1, len(parts) - 1, 2)]
+    return [piece for piece in pieces if piece]
+
+
+def _merge_pieces(pieces, chunk_size, chunk_overlap):
+    """Greedily packs pieces into chunks of at most chunk_size characters, carrying up to chunk_overlap over."""
+    chunks = []
+    current = deque()
+    total = 0
+    for piece in pieces:
+        length = len(piece)
+        if total + length > chunk_size and current:
+            chunk = "".join(current).strip()
+            if chunk:
+                chunks.append(chunk)
+            # Drop pieces from the front until the remainder fits as overlap for the next chunk
+            while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                total -= len(current.popleft())
+        current.append(piece)
+        total += length
+    chunk = "".join(current).strip()
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def split_text(text, chunk_size, chunk_overlap, separators=SEPARATORS):
+    """
+    Recursively splits text on the first separator it contains, falling back to the next separator
+    for pieces that are still too long, then packs the pieces into overlapping chunks.
+    Produces the same chunks as LangChain's RecursiveCharacterTextSplitter with these separators.
+    """
+    separator = separators[-1]
+    remaining = []
+    for idx, sep in enumerate(separators):
+        if sep in text:
+            separator = sep
+            remaining = separators[idx + 1:]
+            break
+
+    chunks = []
+    small_pieces = []
+    for piece in _split_keeping_separator(text, separator):
+        if len(piece) < chunk_size:
+            small_pieces.append(piece)
+            continue
+        if small_pieces:
+            chunks.extend(_merge_pieces(small_pieces, chunk_size, chunk_overlap))
+            small_pieces = []
+        if remaining:
+            chunks.extend(split_text(piece, chunk_size, chunk_overlap, remaining))
+        else:
+            chunks.append(piece)
+    if small_pieces:
+        chunks.extend(_merge_pieces(small_pieces, chunk_size, chunk_overlap))
+    return chunks